@@ -0,0 +1,224 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import mean_squared_error, mean_absolute_error
+from modelling import (
+    DEFAULT_ENGINE, ENGINES, MIN_TEST_ROWS, MIN_TRAIN_ROWS,
+    create_date_features, fit_model, load_data, prepare_features, sort_by_group
+)
+
+BACKTEST_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backtest_cache")
+
+def make_cutoffs(dates, start=None, end=None, step_days=30, horizon_days=30):
+    """Forecast origins every step_days, from a year after the first date until a full horizon remains."""
+    first, last = pd.Timestamp(dates.min()), pd.Timestamp(dates.max())
+    start = pd.Timestamp(start) if start is not None else first + pd.DateOffset(years=1)
+    end = pd.Timestamp(end) if end is not None else last - pd.Timedelta(days=horizon_days - 1)
+    return list(pd.date_range(start, end, freq=f"{step_days}D"))
+
+def fold_slices(dates, bounds, cutoff, horizon_days):
+    """Train and test row ranges of every group for one cutoff.
+
+    Rows of a group are sorted by date, so both ranges are found by binary search
+    in the shared arrays: training is everything before the cutoff, testing the
+    horizon_days starting at it.
+    """
+    cutoff = np.datetime64(cutoff, 'ns')
+    horizon_end = cutoff + np.timedelta64(horizon_days, 'D')
+    starts, ends = bounds[:-1], bounds[1:]
+    train_ends = np.empty(len(starts), dtype=np.int64)
+    test_ends = np.empty(len(starts), dtype=np.int64)
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        group_dates = dates[start:end]
+        train_ends[i] = start + np.searchsorted(group_dates, cutoff)
+        test_ends[i] = start + np.searchsorted(group_dates, horizon_end)
+    return starts, train_ends, test_ends
+
+def fold_key(X, y, train, test, cutoff, horizon_days, feature_columns, engine):
+    """Hash of everything a fold result depends on: its rows, the cutoff and the model setup"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        'cutoff': str(cutoff.date()),
+        'horizon_days': horizon_days,
+        'features': list(feature_columns),
+        'engine': engine,
+        'params': ENGINES[engine][1]
+    }, sort_keys=True).encode())
+    for start, stop in (train, test):
+        for values in (X[start:stop], y[start:stop]):
+            # Fixed dtype, as in ModelRegistry.key, so the column-wide downcast of the target never changes keys
+            values = np.ascontiguousarray(values, dtype=np.float64)
+            digest.update(f"{values.dtype}{values.shape}".encode())
+            digest.update(values.tobytes())
+    return digest.hexdigest()
+
+def run_cutoff(cutoff, folds, X, y, feature_columns, engine, n_jobs=1):
+    """Fit and score the given (group index, train range, test range) folds of one cutoff"""
+    results = []
+    for group, (train_start, train_end), (test_start, test_end) in folds:
+        started = time.perf_counter()
+        model, _ = fit_model(X[train_start:train_end], y[train_start:train_end], feature_columns, engine, n_jobs)
+        y_test = y[test_start:test_end]
+        y_pred = model.predict(X[test_start:test_end])
+        results.append((group, {
+            'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))),
+            'mae': float(mean_absolute_error(y_test, y_pred)),
+            'train_samples': int(train_end - train_start),
+            'test_samples': int(test_end - test_start),
+            'seconds': time.perf_counter() - started
+        }))
+    return results
+
+class FoldCache:
+    """Fold results stored per cutoff, keyed by fold_key.
+
+    One small joblib file per cutoff holds the results of every combination and
+    model setup evaluated at that cutoff, so rerunning a backtest only fits the
+    folds whose data or configuration changed.
+    """
+
+    def __init__(self, path=BACKTEST_CACHE_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, cutoff):
+        return os.path.join(self.path, f"{cutoff.date()}.joblib")
+
+    def load(self, cutoff):
+        try:
+            return joblib.load(self._file(cutoff))
+        except FileNotFoundError:
+            return {}
+
+    def save(self, cutoff, results):
+        tmp_path = f"{self._file(cutoff)}.{os.getpid()}.tmp"
+        joblib.dump(results, tmp_path)
+        os.replace(tmp_path, self._file(cutoff))
+
+def backtest(df, feature_columns, cutoffs, horizon_days=30, engine=DEFAULT_ENGINE, jobs=1, cache=None):
+    """Evaluate every shelter/program combination at every cutoff.
+
+    Features are built and rows sorted by group once; each fold is a pair of row
+    ranges into those arrays. Uncached folds are fitted with one task per cutoff,
+    spread over jobs worker processes. Returns (results DataFrame, cached folds,
+    computed folds).
+    """
+    keys, bounds, columns = sort_by_group(df, feature_columns)
+    X, y, dates = columns['X'], columns['y'], columns['dates']
+
+    cached_results = {}
+    pending = []
+    for cutoff in cutoffs:
+        stored = cache.load(cutoff) if cache is not None else {}
+        folds = []
+        for group, start, train_end, test_end in zip(range(len(keys)), *fold_slices(dates, bounds, cutoff, horizon_days)):
+            if train_end - start < MIN_TRAIN_ROWS or test_end - train_end < MIN_TEST_ROWS:
+                continue
+            train, test = (start, train_end), (train_end, test_end)
+            key = fold_key(X, y, train, test, cutoff, horizon_days, feature_columns, engine)
+            if key in stored:
+                cached_results[(cutoff, group)] = stored[key]
+            else:
+                folds.append((group, train, test, key))
+        pending.append((cutoff, stored, folds))
+
+    tasks = [(cutoff, [fold[:3] for fold in folds]) for cutoff, _, folds in pending if folds]
+    if jobs == 1:
+        outcomes = (run_cutoff(cutoff, folds, X, y, feature_columns, engine, n_jobs=-1) for cutoff, folds in tasks)
+    else:
+        # Large arrays are memory-mapped once and shared by every worker instead of pickled per task
+        outcomes = Parallel(n_jobs=jobs, return_as='generator')(
+            delayed(run_cutoff)(cutoff, folds, X, y, feature_columns, engine) for cutoff, folds in tasks
+        )
+
+    computed_results = {}
+    fold_lists = {cutoff: (stored, folds) for cutoff, stored, folds in pending}
+    for (cutoff, _), results in zip(tasks, outcomes):
+        stored, folds = fold_lists[cutoff]
+        fold_keys = {fold[0]: fold[3] for fold in folds}
+        for group, result in results:
+            computed_results[(cutoff, group)] = result
+            stored[fold_keys[group]] = result
+        if cache is not None:
+            cache.save(cutoff, stored)
+        print(f"  {cutoff.date()}: fitted {len(results)} folds")
+
+    rows = []
+    for (cutoff, group), result in sorted({**cached_results, **computed_results}.items()):
+        shelter_name, program_name = keys[group]
+        rows.append({'cutoff': cutoff, 'shelter_name': shelter_name, 'program_name': program_name, **result})
+    return pd.DataFrame(rows), len(cached_results), len(computed_results)
+
+def pooled_metrics(group):
+    samples = group['test_samples']
+    return np.sqrt((group['rmse'] ** 2 * samples).sum() / samples.sum()), (group['mae'] * samples).sum() / samples.sum()
+
+def print_report(results):
+    print("\n=== BACKTEST BY CUTOFF ===")
+    for cutoff, group in results.groupby('cutoff'):
+        rmse, mae = pooled_metrics(group)
+        print(f"{cutoff.date()}: {len(group)} models, average RMSE={group['rmse'].mean():.2f}, "
+              f"MAE={group['mae'].mean():.2f}; pooled RMSE={rmse:.2f}, MAE={mae:.2f}")
+
+    print("\n=== BACKTEST BY SHELTER ===")
+    for (shelter_name, program_name), group in results.groupby(['shelter_name', 'program_name'], sort=True):
+        rmse, mae = pooled_metrics(group)
+        print(f"{shelter_name} - {program_name}: {len(group)} cutoffs, RMSE={rmse:.2f}, MAE={mae:.2f}")
+
+    rmse, mae = pooled_metrics(results)
+    print("\n=== BACKTEST OVERALL ===")
+    print(f"{len(results)} folds over {results['cutoff'].nunique()} cutoffs: "
+          f"average RMSE={results['rmse'].mean():.2f}, MAE={results['mae'].mean():.2f}; "
+          f"pooled RMSE={rmse:.2f}, MAE={mae:.2f}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the per shelter/program models.")
+    parser.add_argument('--start', help="First cutoff (default: one year after the first date)")
+    parser.add_argument('--end', help="Last possible cutoff (default: the last date with a full horizon after it)")
+    parser.add_argument('--step-days', type=int, default=30, help="Days between cutoffs")
+    parser.add_argument('--horizon-days', type=int, default=30, help="Days scored after each cutoff")
+    parser.add_argument('--engine', choices=list(ENGINES), default=DEFAULT_ENGINE)
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Worker processes evaluating cutoffs in parallel (-1 uses every core)")
+    parser.add_argument('--cache', default=BACKTEST_CACHE_DIR, help="Directory of cached fold results")
+    parser.add_argument('--no-cache', action='store_true', help="Fit every fold without reading or writing the cache")
+    parser.add_argument('--output', help="Also write every fold's metrics to this CSV file")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    print("=== Rolling-Origin Backtest ===\n")
+
+    df = create_date_features(load_data())
+    feature_columns = prepare_features(df)
+    cutoffs = make_cutoffs(df['OCCUPANCY_DATE'], args.start, args.end, args.step_days, args.horizon_days)
+    if not cutoffs:
+        print("No cutoffs between the start and end dates.")
+        return
+    print(f"Engine: {args.engine}; {len(cutoffs)} cutoffs from {cutoffs[0].date()} to {cutoffs[-1].date()} "
+          f"every {args.step_days} days, {args.horizon_days}-day horizon\n")
+
+    started = time.perf_counter()
+    cache = None if args.no_cache else FoldCache(args.cache)
+    results, cached, computed = backtest(
+        df, feature_columns, cutoffs, args.horizon_days, args.engine, args.jobs, cache
+    )
+    elapsed = time.perf_counter() - started
+    print(f"\nBacktest finished in {elapsed:.1f}s: {computed} folds fitted, {cached} loaded from cache")
+
+    if results.empty:
+        print("No combination has enough data at any cutoff.")
+        return
+    print_report(results)
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\nFold results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
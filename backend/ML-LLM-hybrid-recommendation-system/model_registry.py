@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+import joblib
+import numpy as np
+import sklearn
+
+REGISTRY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+class ModelRegistry:
+    """Directory of fitted models saved as compressed joblib files.
+
+    Each model is stored under a hash of everything that determines it: the
+    training rows, the feature list, the estimator and its hyperparameters,
+    and the scikit-learn version. A later run whose training slice for a
+    shelter/program has not changed computes the same hash and loads the
+    model instead of fitting it again.
+    """
+
+    def __init__(self, path=REGISTRY_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def key(self, X, y, feature_columns, estimator, params):
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            'features': list(feature_columns),
+            'estimator': estimator,
+            'params': params,
+            'sklearn': sklearn.__version__
+        }, sort_keys=True).encode())
+        for values in (X, y):
+            # Hashed in a fixed dtype: load_data downcasts OCCUPANCY to the smallest type
+            # that fits the whole column, so one unrelated row could otherwise change every key
+            values = np.ascontiguousarray(values, dtype=np.float64)
+            digest.update(f"{values.dtype}{values.shape}".encode())
+            digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.joblib")
+
+    def load(self, key):
+        """Return the stored model for a key, or None"""
+        try:
+            return joblib.load(self._file(key))
+        except FileNotFoundError:
+            return None
+
+    def save(self, key, model):
+        # Written atomically so parallel workers and interrupted runs never leave a partial file
+        tmp_path = f"{self._file(key)}.{os.getpid()}.tmp"
+        joblib.dump(model, tmp_path, compress=3)
+        os.replace(tmp_path, self._file(key))
+
+    def fit(self, make_model, X, y, feature_columns, params):
+        """Load the model for this training slice or fit and store it; returns (model, cache_hit)"""
+        model = make_model(**params)
+        key = self.key(X, y, feature_columns, type(model).__name__, params)
+        cached = self.load(key)
+        if cached is not None:
+            # Runtime-only settings such as the thread count come from this run
+            if hasattr(model, 'n_jobs'):
+                cached.n_jobs = model.n_jobs
+            return cached, True
+        model.fit(X, y)
+        self.save(key, model)
+        return model, False
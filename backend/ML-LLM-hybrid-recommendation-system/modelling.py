@@ -1,48 +1,141 @@
+import argparse
+import functools
+import inspect
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 from sklearn.preprocessing import StandardScaler
 import warnings
 import json
 import os
+import pickle
+import sys
+import tempfile
+import time
+import joblib
+from model_registry import REGISTRY_DIR, ModelRegistry
+from packed_forest import PackedForests
 warnings.filterwarnings('ignore')
 
+GROUP_COLUMNS = ['SHELTER_NAME', 'PROGRAM_NAME']
+
+# Integer group encodings the pooled --global model uses to tell combinations apart
+GROUP_CODE_COLUMNS = ['SHELTER_CODE', 'PROGRAM_CODE']
+
+# Hyperparameters of the per shelter/program forests; they are part of the registry key
+FOREST_PARAMS = {'n_estimators': 100, 'max_depth': 10, 'random_state': 42}
+
+# The pooled model has to split on shelter and program before it can model occupancy,
+# so it gets deeper trees than the per-combination models
+GLOBAL_MAX_DEPTH = 20
+
+# Boosting stops at a fixed number of iterations so runs are reproducible and registry keys stable
+BOOSTING_PARAMS = {'max_iter': 200, 'learning_rate': 0.1, 'early_stopping': False, 'random_state': 42}
+
+# Estimators selectable with --engine: (estimator, per-combination params, --global params)
+ENGINES = {
+    'random_forest': (RandomForestRegressor, FOREST_PARAMS, {**FOREST_PARAMS, 'max_depth': GLOBAL_MAX_DEPTH}),
+    'hist_gradient_boosting': (HistGradientBoostingRegressor, BOOSTING_PARAMS, BOOSTING_PARAMS)
+}
+DEFAULT_ENGINE = 'random_forest'
+
+# A combination needs at least 10 days of training data and 5 days of test data
+MIN_TRAIN_ROWS = 10
+MIN_TEST_ROWS = 5
+
+# Columns of shelter_master.csv the pipeline reads; addresses, organization and the
+# other descriptive columns are never loaded
+USED_COLUMNS = [
+    'OCCUPANCY_DATE', 'SHELTER_NAME', 'PROGRAM_NAME', 'OCCUPANCY', 'CAPACITY',
+    'OCCUPANCY_LAG_1', 'OCCUPANCY_LAG_7', 'OCCUPANCY_ROLLING_7', 'OCCUPANCY_RATIO'
+]
+
+# Kept in float64 because they enter metrics and recommendation arithmetic directly;
+# float feature columns become float32, which is the precision the forests split on anyway
+TARGET_COLUMNS = ['OCCUPANCY', 'CAPACITY']
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+def report_peak_rss(stage):
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"Peak RSS after {stage}: {peak:.0f} MB")
+
 def load_data():
     """Load the preprocessed shelter master data."""
     print("Loading preprocessed shelter data...")
     # Get the project root directory
     project_root = os.path.dirname(os.path.abspath(__file__))
     data_path = os.path.join(project_root, "data", "shelter_master.csv")
-    df = pd.read_csv(data_path)
+    df = pd.read_csv(
+        data_path,
+        usecols=lambda column: column in USED_COLUMNS,
+        dtype={name: 'category' for name in GROUP_COLUMNS}
+    )
     df['OCCUPANCY_DATE'] = pd.to_datetime(df['OCCUPANCY_DATE'])
+    
+    # The parser merges categories chunk by chunk; sorted categories keep the
+    # codes of encode_groups independent of where names first appear in the file
+    for column in GROUP_COLUMNS:
+        df[column] = df[column].cat.set_categories(sorted(df[column].cat.categories))
+    
+    # Downcast numerics: integer counts to the smallest integer type, float features to float32
+    for column in df.columns:
+        if pd.api.types.is_integer_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+        elif pd.api.types.is_float_dtype(df[column]) and column not in TARGET_COLUMNS:
+            df[column] = df[column].astype(np.float32)
+    
+    # Chronological order lets split_train_test cut the frame into two slices
+    if not df['OCCUPANCY_DATE'].is_monotonic_increasing:
+        df = df.sort_values('OCCUPANCY_DATE', kind='stable', ignore_index=True)
+    
     print(f"Loaded {len(df)} records from {df['OCCUPANCY_DATE'].min()} to {df['OCCUPANCY_DATE'].max()}")
+    report_peak_rss("loading")
     return df
 
 def create_date_features(df):
     """Create date-based features for modeling."""
     print("Creating date features...")
     
-    # Extract date components
-    df['day_of_week'] = df['OCCUPANCY_DATE'].dt.dayofweek
-    df['month'] = df['OCCUPANCY_DATE'].dt.month
-    df['year'] = df['OCCUPANCY_DATE'].dt.year
-    df['day_of_year'] = df['OCCUPANCY_DATE'].dt.dayofyear
-    df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
+    # Extract date components (small integer types; they only feed the models)
+    df['day_of_week'] = df['OCCUPANCY_DATE'].dt.dayofweek.astype(np.int8)
+    df['month'] = df['OCCUPANCY_DATE'].dt.month.astype(np.int8)
+    df['year'] = df['OCCUPANCY_DATE'].dt.year.astype(np.int16)
+    df['day_of_year'] = df['OCCUPANCY_DATE'].dt.dayofyear.astype(np.int16)
+    df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(np.int8)
     
     # Create seasonal features
-    df['is_winter'] = df['month'].isin([12, 1, 2]).astype(int)
-    df['is_summer'] = df['month'].isin([6, 7, 8]).astype(int)
+    df['is_winter'] = df['month'].isin([12, 1, 2]).astype(np.int8)
+    df['is_summer'] = df['month'].isin([6, 7, 8]).astype(np.int8)
     
     return df
 
+def encode_groups(df):
+    """Add integer shelter and program codes, shared by the train and test rows."""
+    for name_column, code_column in zip(GROUP_COLUMNS, GROUP_CODE_COLUMNS):
+        df[code_column] = df[name_column].astype('category').cat.codes
+    return df
+
 def split_train_test(df):
     """Split data into train (before 2019) and test (2019) sets."""
     print("Splitting data into train/test sets...")
     
-    train_mask = df['OCCUPANCY_DATE'] < '2019-01-01'
-    train_df = df[train_mask].copy()
-    test_df = df[~train_mask].copy()
+    # load_data keeps the frame sorted by date, so both sets are row slices of it
+    # rather than masked copies
+    split = df['OCCUPANCY_DATE'].searchsorted(pd.Timestamp('2019-01-01'))
+    train_df = df.iloc[:split]
+    test_df = df.iloc[split:]
     
     print(f"Train set: {len(train_df)} records ({train_df['OCCUPANCY_DATE'].min()} to {train_df['OCCUPANCY_DATE'].max()})")
     print(f"Test set: {len(test_df)} records ({test_df['OCCUPANCY_DATE'].min()} to {test_df['OCCUPANCY_DATE'].max()})")
@@ -67,40 +160,99 @@ def prepare_features(df):
     
     return feature_columns
 
-def train_model_for_shelter(train_data, test_data, shelter_name, program_name, feature_columns):
-    """Train a Random Forest model for a specific shelter and program."""
-    
-    # Filter data for this shelter/program combination
-    train_filtered = train_data[
-        (train_data['SHELTER_NAME'] == shelter_name) & 
-        (train_data['PROGRAM_NAME'] == program_name)
-    ].copy()
-    
-    test_filtered = test_data[
-        (test_data['SHELTER_NAME'] == shelter_name) & 
-        (test_data['PROGRAM_NAME'] == program_name)
-    ].copy()
+def sort_by_group(df, feature_columns=None):
+    """Sort a frame's arrays by shelter/program once.
+
+    Returns (keys, bounds, columns): rows bounds[i]..bounds[i+1]-1 of every array in
+    columns ('y', 'dates', 'capacity' and, with feature_columns, 'X') belong to
+    keys[i], in their original (chronological) order.
+    """
+    # Rows without a shelter or program name belong to no group. How ngroup numbers
+    # them (-1 or NaN) depends on the pandas version, so they are dropped up front
+    missing = df[GROUP_COLUMNS].isna().any(axis=1)
+    if missing.any():
+        df = df[~missing]
+    grouped = df.groupby(GROUP_COLUMNS, sort=False, observed=True)
+    codes = grouped.ngroup().to_numpy()
+    keys = list(grouped.size().index)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+    
+    columns = {
+        'y': df['OCCUPANCY'].to_numpy()[order],
+        'dates': df['OCCUPANCY_DATE'].to_numpy()[order],
+        'capacity': df['CAPACITY'].to_numpy()[order]
+    }
+    if feature_columns is not None:
+        columns['X'] = df[feature_columns].fillna(0).to_numpy(dtype=np.float64)[order]
+    return keys, bounds, columns
+
+def partition_by_group(df, feature_columns=None):
+    """Split a frame into per shelter/program arrays with a single sort.
+
+    Returns {(shelter_name, program_name): {'y', 'dates', 'capacity'[, 'X']}}. Every
+    entry is a slice of the arrays from sort_by_group, so handing a combination its
+    data costs nothing.
+    """
+    keys, bounds, columns = sort_by_group(df, feature_columns)
+    return {
+        key: {name: values[start:end] for name, values in columns.items()}
+        for key, start, end in zip(keys, bounds[:-1], bounds[1:])
+    }
+
+def empty_group(feature_columns=None):
+    """Arrays for a combination that has no rows in a partition."""
+    group = {
+        'y': np.empty(0),
+        'dates': np.empty(0, dtype='datetime64[ns]'),
+        'capacity': np.empty(0)
+    }
+    if feature_columns is not None:
+        group['X'] = np.empty((0, len(feature_columns)))
+    return group
+
+def fit_model(X, y, feature_columns, engine=DEFAULT_ENGINE, n_jobs=-1, registry=None, pooled=False):
+    """Fit an engine's model, or load it from the registry when this exact fit was stored before.
+
+    pooled selects the engine's --global hyperparameters. Returns (model, cache_hit);
+    cache_hit is None without a registry.
+    """
+    estimator, combination_params, pooled_params = ENGINES[engine]
+    params = pooled_params if pooled else combination_params
+    make_model = estimator
+    if 'n_jobs' in inspect.signature(estimator).parameters:
+        make_model = functools.partial(estimator, n_jobs=n_jobs)
+    if registry is None:
+        model = make_model(**params)
+        model.fit(X, y)
+        return model, None
+    return registry.fit(make_model, X, y, feature_columns, params)
+
+def thread_setting(engine, n_jobs):
+    """Threads one fit of the engine uses, printed next to training times"""
+    if 'n_jobs' not in inspect.signature(ENGINES[engine][0]).parameters:
+        return "OpenMP threads on every core"
+    return f"n_jobs={n_jobs}, {effective_n_jobs(n_jobs)} thread(s)"
+
+def has_enough_data(train_group, test_group):
+    return len(train_group['y']) >= MIN_TRAIN_ROWS and len(test_group['y']) >= MIN_TEST_ROWS
+
+def train_model_for_shelter(train_group, test_group, feature_columns, n_jobs=-1, registry=None, engine=DEFAULT_ENGINE):
+    """Train a model for a specific shelter and program."""
     
-    # Skip if insufficient data (need at least 10 days of training data and 5 days of test data)
-    if len(train_filtered) < 10 or len(test_filtered) < 5:
-        return None, None, None, None
+    # Skip if insufficient data
+    if not has_enough_data(train_group, test_group):
+        return None, None, None, None, None
     
     # Prepare features and target
-    X_train = train_filtered[feature_columns].fillna(0)
-    y_train = train_filtered['OCCUPANCY']
-    
-    X_test = test_filtered[feature_columns].fillna(0)
-    y_test = test_filtered['OCCUPANCY']
-    
-    # Train model
-    model = RandomForestRegressor(
-        n_estimators=100,
-        max_depth=10,
-        random_state=42,
-        n_jobs=-1
-    )
+    X_train = train_group['X']
+    y_train = train_group['y']
+    
+    X_test = test_group['X']
+    y_test = test_group['y']
     
-    model.fit(X_train, y_train)
+    # Train model (or reuse the stored one if this shelter's training data is unchanged)
+    model, cache_hit = fit_model(X_train, y_train, feature_columns, engine, n_jobs, registry)
     
     # Make predictions
     y_pred = model.predict(X_test)
@@ -109,116 +261,157 @@ def train_model_for_shelter(train_data, test_data, shelter_name, program_name, f
     rmse = np.sqrt(mean_squared_error(y_test, y_pred))
     mae = mean_absolute_error(y_test, y_pred)
     
-    return model, y_pred, rmse, mae
+    return model, y_pred, rmse, mae, cache_hit
 
-def generate_enhanced_recommendations(test_data, predictions, shelter_name, program_name, historical_data):
-    """Generate enhanced recommendations with qualitative reasoning."""
-    recommendations = []
-    
-    # Get capacity and historical data for this shelter/program
-    shelter_data = test_data[
-        (test_data['SHELTER_NAME'] == shelter_name) & 
-        (test_data['PROGRAM_NAME'] == program_name)
-    ]
-    
-    if len(shelter_data) == 0:
-        return recommendations
+def compute_history_stats(df):
+    """Historical occupancy statistics of every shelter/program from one groupby aggregation.
+
+    Returns {(shelter_name, program_name): stats} with the values
+    generate_enhanced_recommendations reports alongside each recommendation.
+    """
+    # float64 so the day-to-day differences of downcast integer counts are not float32
+    frame = df[GROUP_COLUMNS].assign(OCCUPANCY=df['OCCUPANCY'].astype(np.float64))
+    occupancy = frame.groupby(GROUP_COLUMNS, sort=False, observed=True)['OCCUPANCY']
+    frame = frame.assign(influx=occupancy.diff())
+    stats = frame.groupby(GROUP_COLUMNS, sort=False, observed=True).agg(
+        rows=('OCCUPANCY', 'size'),
+        avg_occupancy=('OCCUPANCY', 'mean'),
+        max_occupancy=('OCCUPANCY', 'max'),
+        occupancy_volatility=('OCCUPANCY', 'std'),
+        avg_daily_influx=('influx', 'mean'),
+        max_daily_influx=('influx', 'max')
+    )
     
-    capacity = shelter_data['CAPACITY'].iloc[0]
+    # Influx needs at least two days of history
+    single_day = stats['rows'] <= 1
+    stats.loc[single_day, ['avg_daily_influx', 'max_daily_influx']] = 0
     
-    # Get historical patterns for this shelter
-    historical_shelter_data = historical_data[
-        (historical_data['SHELTER_NAME'] == shelter_name) & 
-        (historical_data['PROGRAM_NAME'] == program_name)
+    columns = list(stats.columns.drop('rows'))
+    values = stats[columns].to_numpy(dtype=np.float64)
+    return {key: dict(zip(columns, row)) for key, row in zip(stats.index, values)}
+
+# Statistics for a combination without any history rows
+EMPTY_HISTORY_STATS = {
+    'avg_occupancy': 0, 'max_occupancy': 0, 'occupancy_volatility': 0,
+    'avg_daily_influx': 0, 'max_daily_influx': 0
+}
+
+SEVERITY_ACTIONS = {
+    "HIGH": [
+        "Immediate activation of emergency overflow protocols",
+        "Contact partner shelters for temporary bed arrangements",
+        "Consider opening temporary warming centers if weather-related"
+    ],
+    "MEDIUM": [
+        "Increase staff coverage for the predicted period",
+        "Prepare overflow space if available",
+        "Monitor situation closely for escalation"
+    ],
+    "LOW": [
+        "Monitor occupancy trends closely",
+        "Prepare contingency plans if situation worsens"
     ]
+}
+
+def generate_enhanced_recommendations(test_group, predictions, shelter_name, program_name, history_stats):
+    """Generate enhanced recommendations with qualitative reasoning."""
+    recommendations = []
     
-    # Calculate historical statistics
-    avg_occupancy = historical_shelter_data['OCCUPANCY'].mean() if len(historical_shelter_data) > 0 else 0
-    max_occupancy = historical_shelter_data['OCCUPANCY'].max() if len(historical_shelter_data) > 0 else 0
-    occupancy_volatility = historical_shelter_data['OCCUPANCY'].std() if len(historical_shelter_data) > 0 else 0
+    if len(test_group['y']) == 0:
+        return recommendations
     
-    # Calculate additional quantitative metrics for resource planning
-    avg_daily_influx = historical_shelter_data['OCCUPANCY'].diff().mean() if len(historical_shelter_data) > 1 else 0
-    max_daily_influx = historical_shelter_data['OCCUPANCY'].diff().max() if len(historical_shelter_data) > 1 else 0
+    # Get capacity and historical statistics for this shelter/program
+    capacity = test_group['capacity'][0]
+    avg_occupancy = history_stats['avg_occupancy']
+    max_occupancy = history_stats['max_occupancy']
+    occupancy_volatility = history_stats['occupancy_volatility']
+    avg_daily_influx = history_stats['avg_daily_influx']
+    max_daily_influx = history_stats['max_daily_influx']
     seasonal_peak_factor = max_occupancy / avg_occupancy if avg_occupancy > 0 else 1.0
     
     # Check for over-capacity predictions
-    for i, pred in enumerate(predictions):
-        if pred > capacity:
-            date = shelter_data['OCCUPANCY_DATE'].iloc[i]
-            excess = int(pred - capacity)
-            
-            # Determine severity level
-            severity = "LOW" if excess <= 2 else "MEDIUM" if excess <= 5 else "HIGH"
-            
-            # Analyze seasonal patterns
-            month = date.month
-            is_winter = month in [12, 1, 2]
-            is_summer = month in [6, 7, 8]
-            
-            # Generate contextual reasoning
-            reasoning = []
-            
-            if is_winter:
-                reasoning.append("Winter months typically see increased demand due to extreme weather conditions.")
-            elif is_summer:
-                reasoning.append("Summer months may have reduced demand but could indicate other factors.")
-            
-            if pred > max_occupancy * 1.1:
-                reasoning.append("This prediction exceeds historical maximum occupancy by more than 10%.")
-            elif pred > avg_occupancy * 1.2:
-                reasoning.append("This prediction is significantly above average occupancy patterns.")
-            
-            if occupancy_volatility > avg_occupancy * 0.3:
-                reasoning.append("This shelter shows high occupancy volatility, requiring flexible response strategies.")
-            
-            # Generate specific recommendations based on context
-            if severity == "HIGH":
-                action_items = [
-                    "Immediate activation of emergency overflow protocols",
-                    "Contact partner shelters for temporary bed arrangements",
-                    "Consider opening temporary warming centers if weather-related"
-                ]
-            elif severity == "MEDIUM":
-                action_items = [
-                    "Increase staff coverage for the predicted period",
-                    "Prepare overflow space if available",
-                    "Monitor situation closely for escalation"
-                ]
-            else:  # LOW
-                action_items = [
-                    "Monitor occupancy trends closely",
-                    "Prepare contingency plans if situation worsens"
-                ]
-            
-            # Create enhanced message
-            context = " ".join(reasoning) if reasoning else "Based on historical patterns and current trends."
-            actions = "; ".join(action_items)
-            
-            enhanced_message = f"Shelter {shelter_name} ({program_name}) is expected to be over capacity by {excess} beds on {date.strftime('%Y-%m-%d')}. {context} Recommended actions: {actions}"
-            
-            recommendation = {
-                'date': date,
-                'predicted_occupancy': int(pred),
-                'capacity': int(capacity),
-                'excess': excess,
-                'severity': severity,
-                'reasoning': reasoning,
-                'action_items': action_items,
-                'shelter_name': shelter_name,
-                'program_name': program_name,
-                'message': enhanced_message,
-                # Additional quantitative data for resource planning
-                'avg_occupancy': round(avg_occupancy, 1),
-                'max_occupancy': int(max_occupancy),
-                'occupancy_volatility': round(occupancy_volatility, 1),
-                'avg_daily_influx': round(avg_daily_influx, 1),
-                'max_daily_influx': int(max_daily_influx),
-                'seasonal_peak_factor': round(seasonal_peak_factor, 2),
-                'capacity_utilization_rate': round((pred / capacity) * 100, 1),
-                'excess_percentage': round((excess / capacity) * 100, 1)
-            }
-            recommendations.append(recommendation)
+    predictions = np.asarray(predictions)
+    over_capacity = np.flatnonzero(predictions > capacity)
+    if len(over_capacity) == 0:
+        return recommendations
+    
+    predicted = predictions[over_capacity]
+    excess = (predicted - capacity).astype(np.int64)
+    
+    # Determine severity levels
+    severity = np.where(excess <= 2, "LOW", np.where(excess <= 5, "MEDIUM", "HIGH"))
+    
+    # Analyze seasonal patterns
+    dates = pd.DatetimeIndex(test_group['dates'][over_capacity])
+    months = dates.month.to_numpy()
+    is_winter = np.isin(months, [12, 1, 2])
+    is_summer = np.isin(months, [6, 7, 8])
+    above_max = predicted > max_occupancy * 1.1
+    above_avg = predicted > avg_occupancy * 1.2
+    high_volatility = occupancy_volatility > avg_occupancy * 0.3
+    
+    utilization = np.round((predicted / capacity) * 100, 1)
+    excess_percentage = np.round((excess / capacity) * 100, 1)
+    date_strings = dates.strftime('%Y-%m-%d')
+    
+    # Shared by every recommendation of this shelter/program
+    shelter_stats = {
+        'avg_occupancy': round(avg_occupancy, 1),
+        'max_occupancy': int(max_occupancy),
+        'occupancy_volatility': round(occupancy_volatility, 1),
+        'avg_daily_influx': round(avg_daily_influx, 1),
+        'max_daily_influx': int(max_daily_influx),
+        'seasonal_peak_factor': round(seasonal_peak_factor, 2)
+    }
+    
+    # Python only assembles the records; plain lists avoid per-element NumPy scalar access
+    rows = zip(
+        dates, date_strings, predicted.tolist(), excess.tolist(), severity.tolist(),
+        is_winter.tolist(), is_summer.tolist(), above_max.tolist(), above_avg.tolist(),
+        utilization.tolist(), excess_percentage.tolist()
+    )
+    for date, date_string, pred, row_excess, row_severity, winter, summer, over_max, over_avg, rate, percentage in rows:
+        # Generate contextual reasoning
+        reasoning = []
+        
+        if winter:
+            reasoning.append("Winter months typically see increased demand due to extreme weather conditions.")
+        elif summer:
+            reasoning.append("Summer months may have reduced demand but could indicate other factors.")
+        
+        if over_max:
+            reasoning.append("This prediction exceeds historical maximum occupancy by more than 10%.")
+        elif over_avg:
+            reasoning.append("This prediction is significantly above average occupancy patterns.")
+        
+        if high_volatility:
+            reasoning.append("This shelter shows high occupancy volatility, requiring flexible response strategies.")
+        
+        action_items = list(SEVERITY_ACTIONS[row_severity])
+        
+        # Create enhanced message
+        context = " ".join(reasoning) if reasoning else "Based on historical patterns and current trends."
+        actions = "; ".join(action_items)
+        
+        enhanced_message = f"Shelter {shelter_name} ({program_name}) is expected to be over capacity by {row_excess} beds on {date_string}. {context} Recommended actions: {actions}"
+        
+        recommendation = {
+            'date': date,
+            'predicted_occupancy': int(pred),
+            'capacity': int(capacity),
+            'excess': row_excess,
+            'severity': row_severity,
+            'reasoning': reasoning,
+            'action_items': action_items,
+            'shelter_name': shelter_name,
+            'program_name': program_name,
+            'message': enhanced_message,
+            # Additional quantitative data for resource planning
+            **shelter_stats,
+            'capacity_utilization_rate': rate,
+            'excess_percentage': percentage
+        }
+        recommendations.append(recommendation)
     
     return recommendations
 
@@ -308,61 +501,349 @@ def analyze_recommendation_patterns(all_recommendations):
         'total_recommendations': len(all_recommendations)
     }
 
+def summarize_combination(shelter_name, program_name, test_group, history_stats, predictions, rmse, mae, cache_hit=None):
+    """Generate recommendations for scored test rows and build the combination's result."""
+    recommendations = generate_enhanced_recommendations(
+        test_group, predictions, shelter_name, program_name, history_stats
+    )
+    
+    result = {
+        'shelter_name': shelter_name,
+        'program_name': program_name,
+        'rmse': rmse,
+        'mae': mae,
+        'test_samples': len(predictions) if predictions is not None else 0,
+        'recommendations_count': len(recommendations),
+        'cache_hit': cache_hit
+    }
+    return result, recommendations
+
+def train_combination(shelter_name, program_name, train_group, test_group, history_stats,
+                      feature_columns, n_jobs=-1, registry=None, keep_model=False, engine=DEFAULT_ENGINE):
+    """Train, score and generate recommendations for one shelter/program combination.
+
+    Returns (result, recommendations, model), or None when the combination has too
+    little data. The model is only returned with keep_model, so worker processes do
+    not ship every forest back by default.
+    """
+    model, predictions, rmse, mae, cache_hit = train_model_for_shelter(
+        train_group, test_group, feature_columns, n_jobs, registry, engine
+    )
+    if model is None:
+        return None
+    result, recommendations = summarize_combination(
+        shelter_name, program_name, test_group, history_stats, predictions, rmse, mae, cache_hit
+    )
+    return result, recommendations, model if keep_model else None
+
+def run_combinations(function, tasks, jobs=1, **kwargs):
+    """Yield function(*task, **kwargs) for every task in order, optionally across worker processes.
+
+    With more than one job every combination is fitted in its own process with a
+    single-threaded model: the per-combination datasets are too small for the
+    model's own thread pool to pay off, while whole fits parallelize cleanly.
+    """
+    if jobs == 1:
+        return (function(*task, **kwargs) for task in tasks)
+    return Parallel(n_jobs=jobs, return_as='generator')(
+        delayed(function)(*task, **{**kwargs, 'n_jobs': 1}) for task in tasks
+    )
+
+def train_combinations(tasks, feature_columns, jobs=1, registry=None, keep_models=False, engine=DEFAULT_ENGINE):
+    """Yield train_combination outcomes in task order, optionally across worker processes."""
+    return run_combinations(
+        train_combination, tasks, jobs,
+        feature_columns=feature_columns, registry=registry, keep_model=keep_models, engine=engine
+    )
+
+def train_global_model(train_df, test_groups, feature_columns, n_jobs=-1, registry=None, engine=DEFAULT_ENGINE):
+    """Fit one model across every combination and score all test rows in one call.
+
+    Shelter and program enter the model as integer codes, so combinations with too
+    little history for a model of their own still get forecasts. Returns the model,
+    {(shelter_name, program_name): predictions}, the fit and predict seconds and
+    whether the model came from the registry.
+    """
+    started = time.perf_counter()
+    model, cache_hit = fit_model(
+        train_df[feature_columns].fillna(0).to_numpy(dtype=np.float64),
+        train_df['OCCUPANCY'].to_numpy(),
+        feature_columns,
+        engine,
+        n_jobs,
+        registry,
+        pooled=True
+    )
+    fit_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    keys = list(test_groups)
+    X_test = np.concatenate([test_groups[key]['X'] for key in keys]) if keys else np.empty((0, len(feature_columns)))
+    predictions = model.predict(X_test) if len(X_test) else np.empty(0)
+    predict_seconds = time.perf_counter() - started
+    
+    offsets = np.cumsum([len(test_groups[key]['y']) for key in keys])[:-1]
+    return model, dict(zip(keys, np.split(predictions, offsets))), fit_seconds, predict_seconds, cache_hit
+
+def score_global_predictions(tasks, predictions, cache_hit=None):
+    """Yield per-combination outcomes of the pooled model in task order, like train_combinations."""
+    for shelter_name, program_name, _, test_group, history_stats in tasks:
+        y_pred = predictions.get((shelter_name, program_name))
+        if y_pred is None or len(y_pred) == 0:
+            yield None
+            continue
+        y_test = test_group['y']
+        rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+        mae = mean_absolute_error(y_test, y_pred)
+        result, recommendations = summarize_combination(
+            shelter_name, program_name, test_group, history_stats, y_pred, rmse, mae, cache_hit
+        )
+        yield result, recommendations, None
+
+def export_packed_forests(models, test_groups, path):
+    """Pack the per-combination forests into one file and compare it with the sklearn models.
+
+    Scores every test row of every combination in one packed call, checks the
+    predictions against each forest's own predict and reports size and load time.
+    """
+    keys = [key for key in models if key in test_groups]
+    packed = PackedForests.from_models(models)
+    packed.save(path)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path = os.path.join(tmp, "models.joblib")
+        joblib.dump(models, pickle_path, compress=3)
+        pickle_bytes = os.path.getsize(pickle_path)
+        started = time.perf_counter()
+        joblib.load(pickle_path)
+        pickle_load = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    packed = PackedForests.load(path)
+    packed_load = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    packed_predictions = packed.predict_groups({key: test_groups[key]['X'] for key in keys})
+    packed_predict = time.perf_counter() - started
+    
+    # sklearn's threaded predict sums trees in completion order; one thread sums them in order
+    started = time.perf_counter()
+    sklearn_predictions = {key: models[key].set_params(n_jobs=1).predict(test_groups[key]['X']) for key in keys}
+    sklearn_predict = time.perf_counter() - started
+    
+    return {
+        'models': len(models),
+        'rows': sum(len(test_groups[key]['y']) for key in keys),
+        'packed_bytes': os.path.getsize(path),
+        'pickle_bytes': pickle_bytes,
+        'packed_load': packed_load,
+        'pickle_load': pickle_load,
+        'packed_predict': packed_predict,
+        'sklearn_predict': sklearn_predict,
+        'exact': all(np.array_equal(packed_predictions[key], sklearn_predictions[key]) for key in keys)
+    }
+
+def evaluate_engine(shelter_name, program_name, train_group, test_group, history_stats,
+                    feature_columns, engine, n_jobs=-1):
+    """Fit and score one combination with an engine, timing both; None when it has too little data."""
+    if not has_enough_data(train_group, test_group):
+        return None
+    
+    started = time.perf_counter()
+    model, _ = fit_model(train_group['X'], train_group['y'], feature_columns, engine, n_jobs)
+    fit_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    y_pred = model.predict(test_group['X'])
+    predict_seconds = time.perf_counter() - started
+    
+    return {
+        'shelter_name': shelter_name,
+        'program_name': program_name,
+        'engine': engine,
+        'rmse': np.sqrt(mean_squared_error(test_group['y'], y_pred)),
+        'mae': mean_absolute_error(test_group['y'], y_pred),
+        'test_samples': len(y_pred),
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds,
+        'model_bytes': len(pickle.dumps(model))
+    }
+
+def compare_engines(tasks, feature_columns, engines, jobs=1):
+    """Run every engine over the same split and print per-combination and overall metrics.
+
+    Models are always fitted here (the registry is bypassed) so fit times are real.
+    Returns a DataFrame with one row per engine and combination.
+    """
+    rows = []
+    for engine in engines:
+        print(f"Evaluating {engine}...")
+        outcomes = run_combinations(evaluate_engine, tasks, jobs, feature_columns=feature_columns, engine=engine)
+        rows.extend(outcome for outcome in outcomes if outcome is not None)
+    
+    if not rows:
+        print("No combination has enough data to compare engines.")
+        return pd.DataFrame()
+    comparison = pd.DataFrame(rows)
+    
+    print("\n=== ENGINE COMPARISON BY SHELTER ===")
+    for (shelter_name, program_name), group in comparison.groupby(['shelter_name', 'program_name'], sort=False):
+        print(f"{shelter_name} - {program_name}:")
+        for row in group.itertuples(index=False):
+            print(f"  {row.engine}: RMSE={row.rmse:.2f}, MAE={row.mae:.2f}, fit={row.fit_seconds:.2f}s, "
+                  f"predict={row.predict_seconds:.3f}s, size={row.model_bytes / 1e3:.0f} KB")
+    
+    print("\n=== ENGINE COMPARISON OVERALL ===")
+    for engine, group in comparison.groupby('engine', sort=False):
+        # Pooled metrics weight every test row equally; averages weight every combination equally
+        samples = group['test_samples']
+        pooled_rmse = np.sqrt((group['rmse'] ** 2 * samples).sum() / samples.sum())
+        pooled_mae = (group['mae'] * samples).sum() / samples.sum()
+        print(f"{engine}: {len(group)} models, average RMSE={group['rmse'].mean():.2f}, MAE={group['mae'].mean():.2f}; "
+              f"pooled RMSE={pooled_rmse:.2f}, MAE={pooled_mae:.2f}; "
+              f"fit {group['fit_seconds'].sum():.1f}s, predict {group['predict_seconds'].sum():.2f}s, "
+              f"size {group['model_bytes'].sum() / 1e6:.1f} MB")
+    return comparison
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train per shelter/program occupancy models and generate recommendations.")
+    parser.add_argument('--jobs', type=int,
+                        help="Worker processes for training shelter/program models (-1 uses every core; "
+                             "default 1). With --global, the thread count of the pooled fit (default every core)")
+    parser.add_argument('--global', dest='global_model', action='store_true',
+                        help="Fit one pooled model across all shelter/program combinations instead of one per combination")
+    parser.add_argument('--registry', default=REGISTRY_DIR,
+                        help="Directory of stored models reused when a combination's training data is unchanged")
+    parser.add_argument('--no-registry', action='store_true',
+                        help="Fit every model from scratch without reading or writing the registry")
+    parser.add_argument('--export-packed', metavar='PATH',
+                        help="Also write all per-combination forests as one packed NumPy file (.npz)")
+    parser.add_argument('--engine', choices=list(ENGINES), default=DEFAULT_ENGINE,
+                        help="Estimator used for every model")
+    parser.add_argument('--compare-engines', nargs='*', choices=list(ENGINES), metavar='ENGINE',
+                        help="Only compare engines (all when none are named) on the same split: "
+                             "fit/predict time, model size, RMSE and MAE per shelter and overall")
+    args = parser.parse_args()
+    if args.global_model and args.export_packed:
+        parser.error("--export-packed packs per-combination forests and cannot be used with --global")
+    if args.export_packed and args.engine != 'random_forest':
+        parser.error("--export-packed only packs random_forest models")
+    if args.global_model and args.compare_engines is not None:
+        parser.error("--compare-engines compares per-combination models and cannot be used with --global")
+    return args
+
 def main():
     """Main modeling pipeline."""
+    args = parse_args()
+    jobs = 1 if args.jobs is None else args.jobs
+    # One pooled fit has the whole machine to itself, like each fit of the serial loop
+    global_jobs = -1 if args.jobs is None else args.jobs
+    registry = None if args.no_registry else ModelRegistry(args.registry)
+
     print("=== Shelter Occupancy Prediction Model ===\n")
+    print(f"Engine: {args.engine}\n")
     
     # Load and prepare data
     df = load_data()
     df = create_date_features(df)
+    if args.global_model:
+        df = encode_groups(df)
     
     # Split data
     train_df, test_df = split_train_test(df)
     
     # Prepare features
     feature_columns = prepare_features(df)
+    if args.global_model:
+        feature_columns = feature_columns + GROUP_CODE_COLUMNS
     print(f"Using features: {feature_columns}\n")
     
     # Get unique shelter/program combinations
-    shelter_programs = df[['SHELTER_NAME', 'PROGRAM_NAME']].drop_duplicates()
+    shelter_programs = df[GROUP_COLUMNS].drop_duplicates()
+    
+    # Partition every frame once instead of filtering it for each combination
+    train_groups = partition_by_group(train_df, feature_columns)
+    test_groups = partition_by_group(test_df, feature_columns)
+    history_stats = compute_history_stats(df)
+    report_peak_rss("partitioning")
     print(f"Training models for {len(shelter_programs)} shelter/program combinations...\n")
     
     # Store results
     all_results = []
     all_recommendations = []
     
+    tasks = [
+        (
+            shelter_name, program_name,
+            train_groups.get((shelter_name, program_name)) or empty_group(feature_columns),
+            test_groups.get((shelter_name, program_name)) or empty_group(feature_columns),
+            history_stats.get((shelter_name, program_name), EMPTY_HISTORY_STATS)
+        )
+        for shelter_name, program_name in shelter_programs.itertuples(index=False)
+    ]
+    
+    if args.compare_engines is not None:
+        compare_engines(tasks, feature_columns, args.compare_engines or list(ENGINES), jobs)
+        return
+    
     # Train models for each shelter/program combination
-    for idx, (_, row) in enumerate(shelter_programs.iterrows()):
-        shelter_name = row['SHELTER_NAME']
-        program_name = row['PROGRAM_NAME']
-        
-        print(f"Training model {idx+1}/{len(shelter_programs)}: {shelter_name} - {program_name}")
-        
-        model, predictions, rmse, mae = train_model_for_shelter(
-            train_df, test_df, shelter_name, program_name, feature_columns
+    started = time.perf_counter()
+    if args.global_model:
+        print("Training one global model across all combinations...")
+        _, global_predictions, fit_seconds, predict_seconds, cache_hit = train_global_model(
+            train_df, test_groups, feature_columns, global_jobs, registry, args.engine
+        )
+        print(f"{'Loaded model for' if cache_hit else 'Fitted on'} {len(train_df)} rows in {fit_seconds:.1f}s "
+              f"({thread_setting(args.engine, global_jobs)}), "
+              f"scored {len(test_df)} rows in one batch in {predict_seconds:.1f}s\n")
+        outcomes = score_global_predictions(tasks, global_predictions, cache_hit)
+    else:
+        outcomes = train_combinations(
+            tasks, feature_columns, jobs, registry, keep_models=bool(args.export_packed), engine=args.engine
         )
+    models = {}
+    
+    for idx, (task, outcome) in enumerate(zip(tasks, outcomes)):
+        shelter_name, program_name = task[:2]
+        print(f"{'Scoring' if args.global_model else 'Training model'} {idx+1}/{len(tasks)}: {shelter_name} - {program_name}")
         
-        if model is not None:
-            # Generate recommendations
-            recommendations = generate_enhanced_recommendations(
-                test_df, predictions, shelter_name, program_name, df
-            )
-            
-            # Store results
-            result = {
-                'shelter_name': shelter_name,
-                'program_name': program_name,
-                'rmse': rmse,
-                'mae': mae,
-                'test_samples': len(predictions) if predictions is not None else 0,
-                'recommendations_count': len(recommendations)
-            }
+        if outcome is not None:
+            result, recommendations, model = outcome
+            if model is not None:
+                models[(shelter_name, program_name)] = model
             all_results.append(result)
             all_recommendations.extend(recommendations)
             
-            print(f"  RMSE: {rmse:.2f}, MAE: {mae:.2f}, Recommendations: {len(recommendations)}")
+            print(f"  RMSE: {result['rmse']:.2f}, MAE: {result['mae']:.2f}, Recommendations: {len(recommendations)}")
         else:
             print(f"  Skipped - insufficient data")
+    elapsed = time.perf_counter() - started
+    if args.global_model:
+        print(f"\nTrained 1 global model and scored {len(all_results)} combinations in {elapsed:.1f}s "
+              f"({thread_setting(args.engine, global_jobs)})")
+    else:
+        # run_combinations fits single-threaded models in worker processes, or models
+        # using every core one after another
+        print(f"\nTrained {len(all_results)} models in {elapsed:.1f}s with {jobs} job(s) "
+              f"({thread_setting(args.engine, -1 if jobs == 1 else 1)} per model)")
+    if registry is not None:
+        if args.global_model:
+            hits = int(bool(cache_hit))
+            misses = 1 - hits
+        else:
+            hits = sum(1 for result in all_results if result['cache_hit'])
+            misses = len(all_results) - hits
+        print(f"Model registry ({registry.path}): {hits} cache hits, {misses} misses (retrained)")
+    if args.export_packed and models:
+        report = export_packed_forests(models, test_groups, args.export_packed)
+        print(f"\nPacked {report['models']} forests into {args.export_packed}: "
+              f"{report['packed_bytes'] / 1e6:.1f} MB vs {report['pickle_bytes'] / 1e6:.1f} MB as joblib, "
+              f"loads in {report['packed_load']:.2f}s vs {report['pickle_load']:.2f}s")
+        print(f"Scored {report['rows']} test rows in one packed call in {report['packed_predict']:.2f}s "
+              f"vs {report['sklearn_predict']:.2f}s with per-model predict; "
+              f"predictions {'match sklearn exactly' if report['exact'] else 'DIFFER from sklearn'}")
+    
+    report_peak_rss("training")
     
     # Print summary results
     print("\n=== MODEL EVALUATION SUMMARY ===")
@@ -0,0 +1,163 @@
+import numpy as np
+
+# Rows scored per traversal pass; bounds the (rows, trees) node index matrix
+CHUNK_ROWS = 65536
+
+def _round_down_float32(values):
+    # sklearn compares float32 features against float64 thresholds. For a float32 x,
+    # x <= t exactly when x <= the largest float32 not above t, so thresholds can be
+    # stored in float32 without changing a single split decision.
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+class PackedForests:
+    """Many fitted RandomForestRegressors packed into flat NumPy node arrays.
+
+    Every node of every tree of every forest is one slot in the feature,
+    threshold, left, right and value arrays; both children of a leaf are the
+    leaf itself. Forest i owns trees tree_offsets[i]..tree_offsets[i+1]-1,
+    whose root nodes are listed in roots. Prediction walks all (row, tree) pairs of a batch one
+    level per step, so rows of many shelters are scored in a single call, and
+    leaf values are accumulated in tree order exactly like sklearn's predict.
+    """
+
+    def __init__(self, keys, tree_offsets, roots, feature, threshold, left, right, value, n_features, max_depth):
+        self.keys = [tuple(key) for key in keys]
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.tree_offsets = tree_offsets
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.n_features = int(n_features)
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_models(cls, models):
+        """Pack {(shelter_name, program_name): RandomForestRegressor}"""
+        keys, roots, tree_counts = [], [], []
+        features, thresholds, lefts, rights, values = [], [], [], [], []
+        n_features = None
+        max_depth = 0
+        offset = 0
+        for key, model in models.items():
+            if model.n_outputs_ != 1:
+                raise ValueError(f"Model for {key} has {model.n_outputs_} outputs; only single-output forests can be packed")
+            if n_features is None:
+                n_features = model.n_features_in_
+            elif model.n_features_in_ != n_features:
+                raise ValueError(f"Model for {key} uses {model.n_features_in_} features, expected {n_features}")
+            keys.append(key)
+            tree_counts.append(len(model.estimators_))
+            for estimator in model.estimators_:
+                tree = estimator.tree_
+                max_depth = max(max_depth, tree.max_depth)
+                leaf = tree.children_left < 0
+                roots.append(offset)
+                # Leaves read feature 0 and go nowhere; only their value matters
+                features.append(np.where(leaf, 0, tree.feature))
+                thresholds.append(_round_down_float32(tree.threshold))
+                # Child indices become positions in the flat arrays; leaves point at themselves
+                node_ids = np.arange(tree.node_count) + offset
+                lefts.append(np.where(leaf, node_ids, tree.children_left + offset))
+                rights.append(np.where(leaf, node_ids, tree.children_right + offset))
+                values.append(tree.value[:, 0, 0])
+                offset += tree.node_count
+
+        if not keys:
+            raise ValueError("No models to pack")
+        if offset >= np.iinfo(np.int32).max:
+            raise ValueError("Forests have too many nodes for 32-bit node indices")
+        return cls(
+            keys,
+            np.concatenate([[0], np.cumsum(tree_counts)]).astype(np.int64),
+            np.array(roots, dtype=np.int32),
+            np.concatenate(features).astype(np.int16),
+            np.concatenate(thresholds),
+            np.concatenate(lefts).astype(np.int32),
+            np.concatenate(rights).astype(np.int32),
+            np.concatenate(values).astype(np.float64),
+            n_features,
+            max_depth
+        )
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                shelters=np.array([key[0] for key in self.keys], dtype=str),
+                programs=np.array([key[1] for key in self.keys], dtype=str),
+                tree_offsets=self.tree_offsets, roots=self.roots,
+                feature=self.feature, threshold=self.threshold,
+                left=self.left, right=self.right, value=self.value,
+                n_features=self.n_features, max_depth=self.max_depth
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            keys = zip(data["shelters"].tolist(), data["programs"].tolist())
+            return cls(
+                keys, data["tree_offsets"], data["roots"], data["feature"], data["threshold"],
+                data["left"], data["right"], data["value"], data["n_features"], data["max_depth"]
+            )
+
+    def predict(self, X, forest_ids):
+        """Score row i of X with forest forest_ids[i]; forests can differ from row to row"""
+        X = np.asarray(X)
+        forest_ids = np.asarray(forest_ids, dtype=np.int64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected X with {self.n_features} features, got shape {X.shape}")
+        if len(forest_ids) != len(X):
+            raise ValueError("forest_ids needs one entry per row of X")
+        # sklearn scores float32 features; missing-value routing is not packed
+        X = X.astype(np.float32)
+        if np.isnan(X).any():
+            raise ValueError("Packed forests cannot score rows with missing values")
+
+        predictions = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, len(X))
+            predictions[start:stop] = self._predict_chunk(X[start:stop], forest_ids[start:stop])
+        return predictions
+
+    def _predict_chunk(self, X, forest_ids):
+        first_tree = self.tree_offsets[forest_ids]
+        tree_counts = self.tree_offsets[forest_ids + 1] - first_tree
+        max_trees = int(tree_counts.max()) if len(X) else 0
+
+        # (rows, trees) matrix of current nodes; forests with fewer trees are padded
+        # with their own first tree and masked out when summing
+        tree_index = first_tree[:, np.newaxis] + np.arange(max_trees)
+        present = np.arange(max_trees) < tree_counts[:, np.newaxis]
+        nodes = self.roots[np.where(present, tree_index, first_tree[:, np.newaxis])]
+        # Flat positions of each row's features, so a step is a single gather from X
+        row_starts = (np.arange(len(X)) * self.n_features)[:, np.newaxis]
+        X = X.ravel()
+
+        # Leaves point at themselves, so every pair takes max_depth steps without masking
+        for _ in range(self.max_depth):
+            go_left = X[row_starts + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        leaf_values = np.where(present, self.value[nodes], 0.0)
+        # Accumulate tree by tree in estimator order, like sklearn, so sums round identically
+        total = np.zeros(len(forest_ids), dtype=np.float64)
+        for tree in range(max_trees):
+            total += leaf_values[:, tree]
+        return total / tree_counts
+
+    def predict_groups(self, groups):
+        """Score {(shelter_name, program_name): X} for many forests in one call"""
+        keys = [key for key in groups if len(groups[key])]
+        if not keys:
+            return {key: np.empty(0) for key in groups}
+        X = np.concatenate([groups[key] for key in keys])
+        lengths = [len(groups[key]) for key in keys]
+        forest_ids = np.repeat([self.index[key] for key in keys], lengths)
+        predictions = dict(zip(keys, np.split(self.predict(X, forest_ids), np.cumsum(lengths)[:-1])))
+        return {key: predictions.get(key, np.empty(0)) for key in groups}
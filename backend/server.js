@@ -1,10 +1,11 @@
 require('dotenv').config();
 const express = require('express');
 const mongoose = require('mongoose');
-const { exec } = require('child_process');
+const { exec, execFile } = require('child_process');
 const fs = require('fs');
 const cors = require('cors');
 const path = require('path');
+const http = require('http');
 
 const authRoutes = require('./routes/auth');
 const userShelterRoutes = require('./routes/userShelters');
@@ -200,12 +201,35 @@ app.get('/api/shelters', (req, res) => {
   });
 });
 
-// Get forecast for a specific shelter
-app.get('/api/forecast/:shelter', (req, res) => {
-  const shelter = decodeURIComponent(req.params.shelter);
-  const days = req.query.days || 7;
-  
-  console.log(`Getting forecast for shelter: ${shelter}, days: ${days}`);
+// Warm forecast service (python model/predict.py serve) - avoids a cold Python start per request
+const FORECAST_SERVICE_URL = process.env.FORECAST_SERVICE_URL;
+const FORECAST_SERVICE_SOCKET = process.env.FORECAST_SERVICE_SOCKET;
+
+function requestForecastService(requestPath, callback) {
+  let options;
+  if (FORECAST_SERVICE_SOCKET) {
+    options = { socketPath: FORECAST_SERVICE_SOCKET, path: requestPath, timeout: 30000 };
+  } else {
+    const serviceUrl = new URL(FORECAST_SERVICE_URL);
+    options = { hostname: serviceUrl.hostname, port: serviceUrl.port, path: requestPath, timeout: 30000 };
+  }
+
+  const request = http.get(options, (response) => {
+    let body = '';
+    response.on('data', (chunk) => { body += chunk; });
+    response.on('end', () => {
+      try {
+        callback(null, JSON.parse(body));
+      } catch (parseError) {
+        callback(parseError);
+      }
+    });
+  });
+  request.on('timeout', () => request.destroy(new Error('Forecast service timed out')));
+  request.on('error', (error) => callback(error));
+}
+
+function runForecastScript(shelter, days, res) {
   exec(`../venv/bin/python ../model/predict.py forecast "${shelter}" ${days}`, { cwd: __dirname }, (error, stdout, stderr) => {
     if (error) {
       console.error('Python script error:', error);
@@ -222,6 +246,62 @@ app.get('/api/forecast/:shelter', (req, res) => {
       res.status(500).json({ error: "Invalid JSON format from Python script" });
     }
   });
+}
+
+// Get forecast for a specific shelter
+app.get('/api/forecast/:shelter', (req, res) => {
+  const shelter = decodeURIComponent(req.params.shelter);
+  const days = req.query.days || 7;
+  
+  console.log(`Getting forecast for shelter: ${shelter}, days: ${days}`);
+  if (!FORECAST_SERVICE_URL && !FORECAST_SERVICE_SOCKET) {
+    return runForecastScript(shelter, days, res);
+  }
+
+  const requestPath = `/forecast?shelter=${encodeURIComponent(shelter)}&days=${encodeURIComponent(days)}`;
+  requestForecastService(requestPath, (error, json) => {
+    if (error) {
+      console.error('Forecast service unavailable, falling back to predict.py:', error.message);
+      return runForecastScript(shelter, days, res);
+    }
+    res.json(json);
+  });
+});
+
+// Look up published forecast-all results (indexed SQLite reads instead of parsing predictions.json)
+app.get('/api/published-forecasts', (req, res) => {
+  const query = new URLSearchParams();
+  ['shelter', 'date', 'horizon'].forEach((key) => {
+    if (req.query[key]) query.set(key, req.query[key]);
+  });
+
+  const runQueryScript = () => {
+    const args = Array.from(query.entries()).flatMap(([key, value]) => [`--${key}`, value]);
+    execFile('../venv/bin/python', ['../model/predict.py', 'query-forecasts', ...args], { cwd: __dirname }, (error, stdout, stderr) => {
+      if (error) {
+        console.error('Python script error:', error);
+        console.error('Stderr:', stderr);
+        return res.status(500).json({ error: "Python script execution failed" });
+      }
+      try {
+        res.json(JSON.parse(stdout));
+      } catch (parseError) {
+        console.error('JSON parse error:', parseError);
+        res.status(500).json({ error: "Invalid JSON format from Python script" });
+      }
+    });
+  };
+
+  if (!FORECAST_SERVICE_URL && !FORECAST_SERVICE_SOCKET) {
+    return runQueryScript();
+  }
+  requestForecastService(`/published?${query.toString()}`, (error, json) => {
+    if (error) {
+      console.error('Forecast service unavailable, falling back to predict.py:', error.message);
+      return runQueryScript();
+    }
+    res.json(json);
+  });
 });
 
 // Get AI-powered recommendations based on predicted influx
@@ -0,0 +1,63 @@
+"""Benchmark the vectorized window feature builder against the old iterrows loop.
+
+Usage: python model/benchmarks/bench_features.py [n_windows]
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from predict import build_feature_windows
+
+def build_feature_window_iterrows(recent_data):
+    """The original per-row feature loop from prepare_data_for_prediction"""
+    features = []
+    for _, row in recent_data.iterrows():
+        feature_vector = []
+        feature_vector.extend([
+            row['OCCUPANCY_DATE'].weekday(),
+            row['OCCUPANCY_DATE'].month,
+            row['OCCUPANCY_DATE'].day,
+            row['OCCUPANCY_DATE'].year,
+        ])
+        feature_vector.extend([
+            row['OCCUPANCY'],
+            row['OCCUPANCY'] / 100.0,
+        ])
+        for i in range(40):
+            feature_vector.append(0.0)
+        features.append(feature_vector)
+    return np.array(features, dtype=np.float32)
+
+def make_windows(n_windows, seed=0):
+    """Generate random 30-day occupancy windows"""
+    rng = np.random.default_rng(seed)
+    starts = np.datetime64('2017-01-01') + rng.integers(0, 1500, n_windows).astype('timedelta64[D]')
+    dates = (starts[:, np.newaxis] + np.arange(30).astype('timedelta64[D]')).astype('datetime64[ns]')
+    occupancy = rng.integers(0, 400, (n_windows, 30))
+    return dates, occupancy
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    n_windows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    dates, occupancy = make_windows(n_windows)
+    frames = [pd.DataFrame({'OCCUPANCY_DATE': dates[i], 'OCCUPANCY': occupancy[i]}) for i in range(n_windows)]
+
+    for label, count in [("1 window", 1), (f"{n_windows} windows", n_windows)]:
+        loop_time, loop_result = timed(lambda: np.stack([build_feature_window_iterrows(f) for f in frames[:count]]))
+        vector_time, vector_result = timed(lambda: build_feature_windows(dates[:count], occupancy[:count]))
+        assert np.array_equal(loop_result, vector_result), "vectorized features differ from the iterrows path"
+        print(f"{label:>16}: iterrows {loop_time * 1000:9.2f} ms | vectorized {vector_time * 1000:8.3f} ms | "
+              f"speedup {loop_time / vector_time:8.1f}x")
+
+if __name__ == "__main__":
+    main()
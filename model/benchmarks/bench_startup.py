@@ -0,0 +1,148 @@
+"""Measure cold-start cost (import time, wall time, peak RSS) of each predict.py command.
+
+Usage:
+    python model/benchmarks/bench_startup.py            # compare against startup_baseline.json
+    python model/benchmarks/bench_startup.py --update   # re-record the baseline
+
+Each scenario runs in a fresh interpreter against a synthetic occupancy CSV, so the
+numbers do not depend on the size of the real data. The comparison fails (exit code 1)
+when a command gets noticeably slower or heavier than the recorded baseline.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'startup_baseline.json')
+
+# Allowed regression before the check fails
+WALL_TIME_FACTOR = 1.5
+WALL_TIME_SLACK_S = 0.1
+RSS_FACTOR = 1.25
+
+# Forecasts bypass the result cache, otherwise every run after the first would
+# be a cache hit read from the real data/forecast_cache.sqlite
+SCENARIOS = {
+    "usage": [],
+    "shelters": ["shelters"],
+    "shelters (store)": ["shelters"],
+    "forecast (numpy)": ["forecast", "Shelter 00", "7", "--backend", "numpy", "--no-cache"],
+    "forecast (keras)": ["forecast", "Shelter 00", "7", "--backend", "keras", "--no-cache"],
+}
+
+RUNNER = """
+import contextlib, io, json, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {model_dir!r})
+import predict
+import_s = time.perf_counter() - start
+predict.DATA_PATH = {data_path!r}
+predict.STORE_DIR = {store_dir!r}
+sys.argv = ["predict.py"] + {args!r}
+with contextlib.redirect_stdout(io.StringIO()):
+    predict.main()
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "import_s": import_s,
+    "run_s": time.perf_counter() - start,
+    "max_rss_mb": max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    "tensorflow_loaded": "tensorflow" in sys.modules,
+    "pandas_loaded": "pandas" in sys.modules,
+}}))
+"""
+
+def write_synthetic_data(path, n_shelters=50, n_days=400):
+    """Write a small occupancy CSV with the columns predict.py reads"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2019-01-01', periods=n_days)
+    df = pd.DataFrame({
+        'OCCUPANCY_DATE': np.tile(dates.strftime('%Y-%m-%d'), n_shelters),
+        'FACILITY_NAME': np.repeat([f"Shelter {i:02d}" for i in range(n_shelters)], n_days),
+        'OCCUPANCY': rng.integers(0, 200, n_shelters * n_days),
+    })
+    df.to_csv(path, index=False)
+
+def run_scenario(args, data_path, store_dir, repeat):
+    """Run one command in fresh interpreters and keep the median measurements"""
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3")
+    code = RUNNER.format(model_dir=MODEL_DIR, data_path=data_path, store_dir=store_dir, args=args)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+        sample = json.loads(output.stdout.strip().splitlines()[-1])
+        sample["wall_s"] = time.perf_counter() - start
+        samples.append(sample)
+    result = {key: statistics.median(s[key] for s in samples) for key in ("wall_s", "import_s", "run_s", "max_rss_mb")}
+    result.update({key: samples[0][key] for key in ("tensorflow_loaded", "pandas_loaded")})
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in result.items()}
+
+def measure(repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'shelter_occupancy.csv')
+        write_synthetic_data(data_path)
+        missing_store = os.path.join(tmp, 'no_store')
+        compiled_store = os.path.join(tmp, 'store')
+
+        sys.path.insert(0, MODEL_DIR)
+        from occupancy_store import compile_store
+        compile_store(data_path, compiled_store)
+
+        results = {}
+        for name, args in SCENARIOS.items():
+            store_dir = compiled_store if "(store)" in name else missing_store
+            results[name] = run_scenario(args, data_path, store_dir, repeat)
+            print(f"{name:>18}: wall {results[name]['wall_s']:6.2f} s | import {results[name]['import_s']:6.2f} s | "
+                  f"rss {results[name]['max_rss_mb']:7.1f} MB | tensorflow {results[name]['tensorflow_loaded']}")
+        return results
+
+def compare(results, baseline):
+    """Return human-readable regressions against the baseline"""
+    regressions = []
+    for name, current in results.items():
+        expected = baseline["scenarios"].get(name)
+        if expected is None:
+            continue
+        if current["wall_s"] > expected["wall_s"] * WALL_TIME_FACTOR + WALL_TIME_SLACK_S:
+            regressions.append(f"{name}: wall time {current['wall_s']:.2f} s vs baseline {expected['wall_s']:.2f} s")
+        if current["max_rss_mb"] > expected["max_rss_mb"] * RSS_FACTOR:
+            regressions.append(f"{name}: peak RSS {current['max_rss_mb']:.0f} MB vs baseline {expected['max_rss_mb']:.0f} MB")
+        if current["tensorflow_loaded"] and not expected["tensorflow_loaded"]:
+            regressions.append(f"{name}: now imports tensorflow")
+    return regressions
+
+def main():
+    update = "--update" in sys.argv
+    results = measure(repeat=3)
+
+    if update or not os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "scenarios": results
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline)
+    if regressions:
+        print("\nCold-start regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo cold-start regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Compare the NumPy inference backend against Keras on the same windows.
+
+Usage: python model/benchmarks/compare_backends.py [n_windows]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from predict import build_feature_windows, load_model
+from bench_features import make_windows
+
+# model.h5 uses the mixed_float16 policy, so Keras outputs are float16 values;
+# one float16 step at typical occupancy levels (128-256) is 0.125
+TOLERANCE = 0.25
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def main():
+    n_windows = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    features = build_feature_windows(*make_windows(n_windows))
+
+    numpy_load, numpy_model = timed(lambda: load_model("numpy"))
+    keras_load, keras_model = timed(lambda: load_model("keras"))
+
+    # Warm up once so the timings below measure steady-state inference
+    keras_model.predict(features[:1], verbose=0)
+    numpy_model.predict(features[:1])
+
+    for count in (1, n_windows):
+        keras_time, expected = timed(lambda: keras_model.predict(features[:count], verbose=0))
+        numpy_time, actual = timed(lambda: numpy_model.predict(features[:count]))
+        max_error = float(np.abs(expected.astype(np.float32) - actual).max())
+        print(f"{count:>5} windows: keras {keras_time * 1000:8.2f} ms | numpy {numpy_time * 1000:8.2f} ms | "
+              f"max abs error {max_error:.4f}")
+        assert max_error <= TOLERANCE, f"NumPy backend differs from Keras by {max_error}"
+
+    print(f"model load (incl. imports): keras {keras_load:.2f} s | numpy {numpy_load:.2f} s")
+
+if __name__ == "__main__":
+    main()
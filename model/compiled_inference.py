@@ -0,0 +1,66 @@
+import numpy as np
+
+# Batches are padded up to one of these sizes so the compiled function only ever
+# sees a handful of shapes; larger batches run in chunks of the biggest bucket
+BATCH_BUCKETS = (1, 8, 32, 128, 512)
+
+# XLA's CPU LSTM loop is much faster for single-shelter batches but far slower for
+# large ones, so buckets above this size always run the plain graph
+XLA_MAX_BUCKET = 32
+
+def bucket_size(batch):
+    """Smallest bucket that holds the batch"""
+    for size in BATCH_BUCKETS:
+        if batch <= size:
+            return size
+    return BATCH_BUCKETS[-1]
+
+class CompiledModel:
+    """Keras model wrapped in a fixed-signature tf.function.
+
+    model.predict builds a data pipeline and callbacks on every call, which dominates
+    the cost of tiny forecast batches, and it may retrace when batch shapes change.
+    Calling a tf.function with a fixed (None, steps, features) signature avoids both;
+    padding to BATCH_BUCKETS keeps XLA (which compiles per concrete shape) to a few
+    compilations, and XLA is only used up to XLA_MAX_BUCKET.
+    """
+
+    def __init__(self, model, jit_compile=False):
+        import tensorflow as tf
+
+        self.model = model
+        self.jit_compile = jit_compile
+        _, steps, features = model.input_shape
+        self.input_shape = (steps, features)
+        signature = [tf.TensorSpec([None, steps, features], tf.float32)]
+        self._call = tf.function(lambda x: model(x, training=False), input_signature=signature)
+        self._xla_call = None
+        if jit_compile:
+            self._xla_call = tf.function(
+                lambda x: model(x, training=False), input_signature=signature, jit_compile=True
+            )
+
+    def warmup(self):
+        """Compile every bucket up front so no request pays tracing time"""
+        for size in BATCH_BUCKETS:
+            self.predict(np.zeros((size,) + self.input_shape, dtype=np.float32))
+
+    def predict(self, features, verbose=0):
+        """Same contract as keras Model.predict: a (batch, outputs) NumPy array"""
+        features = np.asarray(features, dtype=np.float32)
+        outputs = []
+        largest = BATCH_BUCKETS[-1]
+        for start in range(0, len(features), largest):
+            chunk = features[start:start + largest]
+            rows = len(chunk)
+            padded_size = bucket_size(rows)
+            if padded_size != rows:
+                padding = np.zeros((padded_size - rows,) + chunk.shape[1:], dtype=np.float32)
+                chunk = np.concatenate([chunk, padding])
+            call = self._call
+            if self._xla_call is not None and padded_size <= XLA_MAX_BUCKET:
+                call = self._xla_call
+            outputs.append(np.asarray(call(chunk))[:rows])
+        if not outputs:
+            return np.zeros((0,) + tuple(self.model.output_shape[1:]), dtype=np.float32)
+        return np.concatenate(outputs)
@@ -0,0 +1,129 @@
+import json
+import os
+import sqlite3
+import time
+
+CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'forecast_cache.sqlite')
+
+# Defaults keep the cache small; one forecast result is roughly 1 KB per week of horizon
+MAX_ENTRIES = 5000
+MAX_BYTES = 50 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    key TEXT PRIMARY KEY,
+    shelter TEXT NOT NULL,
+    days INTEGER NOT NULL,
+    forecast_date TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS forecasts_last_access ON forecasts (last_access);
+"""
+
+def file_version(path):
+    """Identify a version of a file by size and modification time"""
+    if not os.path.exists(path):
+        return "missing"
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+class ForecastCache:
+    """SQLite-backed forecast cache shared safely between processes.
+
+    Entries are keyed by shelter, horizon, forecast date and the versions of the
+    occupancy data and model they were computed from, so any change to either
+    input makes old entries unreachable. Processes serving other versions (a
+    different backend, or a service still on older data) share the file, so
+    writes only purge entries for past forecast dates; superseded versions age
+    out as least recently used entries are evicted beyond max_entries / max_bytes.
+    """
+
+    def __init__(self, data_version, model_version, path=CACHE_PATH,
+                 max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.data_version = data_version
+        self.model_version = model_version
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # A fresh connection per operation keeps the cache safe to use from
+        # server threads; WAL lets readers proceed while another process writes
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _key(self, shelter_name, days, forecast_date):
+        return json.dumps([shelter_name, days, forecast_date, self.data_version, self.model_version])
+
+    def get(self, shelter_name, days, forecast_date):
+        """Return a cached forecast result or None"""
+        key = self._key(shelter_name, days, forecast_date)
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT result FROM forecasts WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE forecasts SET last_access = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+        finally:
+            conn.close()
+
+    def put(self, shelter_name, days, forecast_date, result):
+        """Store a forecast result, dropping past forecast dates and evicting LRU entries"""
+        payload = json.dumps(result)
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self._key(shelter_name, days, forecast_date), shelter_name, days, forecast_date,
+                     self.data_version, self.model_version, payload, len(payload), now, now)
+                )
+                conn.execute("DELETE FROM forecasts WHERE forecast_date < ?", (forecast_date,))
+                self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM forecasts").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        removed = 0
+        removed_bytes = 0
+        for key, size in conn.execute("SELECT key, size FROM forecasts ORDER BY last_access").fetchall():
+            if count - removed <= self.max_entries and total - removed_bytes <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM forecasts WHERE key = ?", (key,))
+            removed += 1
+            removed_bytes += size
+
+    def stats(self):
+        """Return entry count and stored bytes"""
+        conn = self._connect()
+        try:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM forecasts").fetchone()
+        finally:
+            conn.close()
+        return {"entries": count, "bytes": total, "path": os.path.abspath(self.path)}
+
+    def clear(self):
+        """Remove every cached forecast"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM forecasts")
+        finally:
+            conn.close()
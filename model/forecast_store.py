@@ -0,0 +1,147 @@
+import os
+import sqlite3
+
+FORECAST_STORE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'forecast_store.sqlite')
+
+# Older publications kept around so a bad run can be rolled back with activate()
+KEEP_VERSIONS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS publications (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    model_version TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    generated_at TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    days INTEGER NOT NULL,
+    shelters INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS forecasts (
+    version INTEGER NOT NULL,
+    shelter TEXT NOT NULL,
+    forecast_date TEXT NOT NULL,
+    horizon INTEGER NOT NULL,
+    predicted_occupancy INTEGER NOT NULL,
+    latest_data_date TEXT NOT NULL,
+    PRIMARY KEY (version, shelter, forecast_date, horizon)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS forecasts_by_date ON forecasts (version, forecast_date, horizon);
+CREATE TABLE IF NOT EXISTS active (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL
+);
+"""
+
+COLUMNS = ("shelter", "forecast_date", "horizon", "predicted_occupancy", "latest_data_date")
+
+class ForecastStore:
+    """SQLite store of published multi-horizon forecasts.
+
+    Each forecast-all run is written as a new publication and becomes visible
+    in the same transaction that moves the active pointer to it, so readers see
+    either the previous or the new forecasts, never a mix. Rows are keyed by
+    (version, shelter, date, horizon), which makes per-shelter and per-date
+    lookups index reads regardless of how many shelters and horizons are stored.
+    """
+
+    def __init__(self, path=FORECAST_STORE_PATH):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # Same pattern as the forecast cache: one connection per operation, WAL
+        # so the backend can keep reading while forecast-all publishes
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def publish(self, model_version, data_version, generated_at, current_date, days, shelters):
+        """Insert a publication from forecast-all's per-shelter results and make it active"""
+        rows = [
+            (shelter["shelter"], day["date"], day["day"], day["predicted_occupancy"], shelter["latest_data_date"])
+            for shelter in shelters for day in shelter["forecast"]
+        ]
+        conn = self._connect()
+        try:
+            with conn:
+                version = conn.execute(
+                    "INSERT INTO publications (model_version, data_version, generated_at, run_date, days, shelters) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (model_version, data_version, generated_at, current_date, days, len(shelters))
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO forecasts VALUES (?, ?, ?, ?, ?, ?)",
+                    [(version,) + row for row in rows]
+                )
+                conn.execute("INSERT OR REPLACE INTO active VALUES (0, ?)", (version,))
+                self._prune(conn, version)
+            # Fresh statistics let SQLite pick the date index for per-date lookups
+            conn.execute("ANALYZE forecasts")
+        finally:
+            conn.close()
+        return version
+
+    def _prune(self, conn, active_version):
+        stale = [row[0] for row in conn.execute(
+            "SELECT version FROM publications WHERE version != ? ORDER BY version DESC LIMIT -1 OFFSET ?",
+            (active_version, KEEP_VERSIONS - 1)
+        )]
+        for version in stale:
+            conn.execute("DELETE FROM forecasts WHERE version = ?", (version,))
+            conn.execute("DELETE FROM publications WHERE version = ?", (version,))
+
+    def activate(self, version):
+        """Point readers at an earlier publication (rollback)"""
+        conn = self._connect()
+        try:
+            with conn:
+                if conn.execute("SELECT 1 FROM publications WHERE version = ?", (version,)).fetchone() is None:
+                    raise ValueError(f"Unknown forecast version {version}")
+                conn.execute("INSERT OR REPLACE INTO active VALUES (0, ?)", (version,))
+        finally:
+            conn.close()
+
+    def versions(self):
+        """Return every kept publication, newest first, with the active one flagged"""
+        conn = self._connect()
+        try:
+            active = conn.execute("SELECT version FROM active").fetchone()
+            rows = conn.execute(
+                "SELECT version, model_version, data_version, generated_at, run_date, days, shelters "
+                "FROM publications ORDER BY version DESC"
+            ).fetchall()
+        finally:
+            conn.close()
+        keys = ("version", "model_version", "data_version", "generated_at", "current_date", "days", "shelters")
+        return [dict(zip(keys, row), active=active is not None and row[0] == active[0]) for row in rows]
+
+    def query(self, shelter=None, forecast_date=None, horizon=None, model_version=None):
+        """Look up forecasts of the active publication (or the newest one of a model version)"""
+        conn = self._connect()
+        try:
+            if model_version is None:
+                row = conn.execute("SELECT version FROM active").fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT MAX(version) FROM publications WHERE model_version = ?", (model_version,)
+                ).fetchone()
+            if row is None or row[0] is None:
+                return None, []
+
+            clauses, params = ["version = ?"], [row[0]]
+            for column, value in (("shelter", shelter), ("forecast_date", forecast_date), ("horizon", horizon)):
+                if value is not None:
+                    clauses.append(f"{column} = ?")
+                    params.append(value)
+            results = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM forecasts WHERE {' AND '.join(clauses)} "
+                "ORDER BY shelter, forecast_date, horizon",
+                params
+            ).fetchall()
+        finally:
+            conn.close()
+        return row[0], [dict(zip(COLUMNS, result)) for result in results]
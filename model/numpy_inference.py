@@ -0,0 +1,214 @@
+import json
+import numpy as np
+
+# Layers that only matter during training and are identity at inference time
+PASSTHROUGH_LAYERS = {"InputLayer", "Dropout"}
+
+def sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+def relu(x):
+    return np.maximum(x, 0.0)
+
+def linear(x):
+    return x
+
+ACTIVATIONS = {"sigmoid": sigmoid, "tanh": np.tanh, "relu": relu, "linear": linear}
+
+def _layer_weights(group):
+    """Collect a layer's datasets from an h5 group by their short name"""
+    weights = {}
+
+    def collect(name, obj):
+        if hasattr(obj, 'shape'):
+            weights[name.split('/')[-1]] = obj[()]
+
+    group.visititems(collect)
+    return weights
+
+def _compute_dtype(cfg):
+    """Return the dtype a layer computes in under its Keras dtype policy"""
+    policy = cfg.get("dtype")
+    if isinstance(policy, dict):
+        policy = policy.get("config", {}).get("name")
+    return "float16" if policy in ("mixed_float16", "float16") else "float32"
+
+def _check_activation(name, activation):
+    if activation not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation '{activation}' in layer '{name}'")
+
+def read_h5_layers(h5_path):
+    """Read the layer stack and weights of a Sequential Keras model from an .h5 file"""
+    import h5py
+
+    layers = []
+    with h5py.File(h5_path, 'r') as f:
+        config = json.loads(f.attrs['model_config'])
+        if config.get("class_name") != "Sequential":
+            raise ValueError(f"Only Sequential models are supported, got {config.get('class_name')}")
+
+        for layer in config["config"]["layers"]:
+            kind = layer["class_name"]
+            cfg = layer["config"]
+            if kind in PASSTHROUGH_LAYERS:
+                continue
+            weights = _layer_weights(f['model_weights'][cfg["name"]])
+
+            if kind == "LSTM":
+                for key in ("activation", "recurrent_activation"):
+                    _check_activation(cfg["name"], cfg[key])
+                layers.append({
+                    "type": "lstm",
+                    "compute_dtype": _compute_dtype(cfg),
+                    "units": cfg["units"],
+                    "return_sequences": cfg["return_sequences"],
+                    "activation": cfg["activation"],
+                    "recurrent_activation": cfg["recurrent_activation"],
+                    "kernel": weights["kernel"],
+                    "recurrent_kernel": weights["recurrent_kernel"],
+                    "bias": weights.get("bias", np.zeros(4 * cfg["units"], dtype=np.float32))
+                })
+            elif kind == "Dense":
+                _check_activation(cfg["name"], cfg["activation"])
+                layers.append({
+                    "type": "dense",
+                    "compute_dtype": _compute_dtype(cfg),
+                    "activation": cfg["activation"],
+                    "kernel": weights["kernel"],
+                    "bias": weights.get("bias", np.zeros(cfg["units"], dtype=np.float32))
+                })
+            else:
+                raise ValueError(f"Unsupported layer type '{kind}' in layer '{cfg['name']}'")
+
+    return layers
+
+WEIGHT_KEYS = ("kernel", "recurrent_kernel", "bias")
+
+def quantize_layers(layers, mode):
+    """Return a copy of the layer stack with float16 or int8 weights.
+
+    int8 uses symmetric per-output-column scales for the kernels; biases stay in
+    float32 because they are tiny and sensitive to rounding. The first layer's
+    input kernel is kept in float16: it multiplies raw, unscaled features (the
+    year is ~2000), which turns int8 rounding into errors of tens of beds.
+    """
+    if mode not in ("float16", "int8"):
+        raise ValueError(f"Unsupported quantization mode '{mode}'")
+    quantized = []
+    for position, layer in enumerate(layers):
+        layer = dict(layer)
+        for key in ("kernel", "recurrent_kernel"):
+            weights = np.asarray(layer[key], dtype=np.float32) if key in layer else None
+            if weights is None:
+                continue
+            if mode == "float16" or (position == 0 and key == "kernel"):
+                layer[key] = weights.astype(np.float16)
+            else:
+                scale = np.abs(weights).max(axis=0) / 127.0
+                scale[scale == 0] = 1.0
+                layer[key] = np.round(weights / scale).astype(np.int8)
+                layer[f"{key}_scale"] = scale.astype(np.float32)
+        if "bias" in layer and mode == "float16":
+            layer["bias"] = np.asarray(layer["bias"], dtype=np.float32).astype(np.float16)
+        layer["quantization"] = mode
+        quantized.append(layer)
+    return quantized
+
+def _round_to(x, compute_dtype):
+    """Round float32 values to the precision of a layer's compute dtype"""
+    if compute_dtype == "float16":
+        return x.astype(np.float16).astype(np.float32)
+    return x
+
+class NumpyModel:
+    """NumPy forward pass for the LSTM/Dense forecasting model, no TensorFlow required"""
+
+    def __init__(self, layers, dtype=np.float32):
+        self.dtype = dtype
+        self.layers = []
+        for layer in layers:
+            layer = dict(layer)
+            layer.setdefault("compute_dtype", "float32")
+            if "quantization" not in layer:
+                for key in WEIGHT_KEYS:
+                    if key in layer:
+                        # mixed_float16 layers see float16-rounded weights; math stays in float32
+                        layer[key] = _round_to(np.asarray(layer[key], dtype=dtype), layer["compute_dtype"])
+            self.layers.append(layer)
+
+    @classmethod
+    def from_h5(cls, h5_path):
+        return cls(read_h5_layers(h5_path))
+
+    @classmethod
+    def from_npz(cls, npz_path):
+        with np.load(npz_path) as data:
+            specs = json.loads(str(data["layers"]))
+            for name in data.files:
+                if "/" in name:
+                    index, key = name.split("/", 1)
+                    specs[int(index)][key] = data[name]
+        return cls(specs)
+
+    def save_npz(self, npz_path):
+        """Export the weights to a compressed .npz that loads without h5py"""
+        arrays = {}
+        specs = []
+        for i, layer in enumerate(self.layers):
+            spec = {}
+            for key, value in layer.items():
+                if isinstance(value, np.ndarray):
+                    arrays[f"{i}/{key}"] = value
+                else:
+                    spec[key] = value
+            specs.append(spec)
+        np.savez_compressed(npz_path, layers=json.dumps(specs), **arrays)
+
+    def weight_bytes(self):
+        """Return the memory held by the weight arrays"""
+        return sum(value.nbytes for layer in self.layers for value in layer.values() if isinstance(value, np.ndarray))
+
+    def _weights(self, layer, key):
+        # Quantized weights stay compact at rest and are widened once per forward
+        # pass; int8 kernels carry one scale per output column
+        weights = layer[key].astype(self.dtype, copy=False)
+        scale = layer.get(f"{key}_scale")
+        return weights * scale if scale is not None else weights
+
+    def _lstm(self, layer, x):
+        units = layer["units"]
+        activation = ACTIVATIONS[layer["activation"]]
+        recurrent_activation = ACTIVATIONS[layer["recurrent_activation"]]
+
+        # Input projections for every time step in one matmul
+        projected = x @ self._weights(layer, "kernel") + self._weights(layer, "bias")
+        recurrent_kernel = self._weights(layer, "recurrent_kernel")
+        batch, steps, _ = projected.shape
+        h = np.zeros((batch, units), dtype=self.dtype)
+        c = np.zeros((batch, units), dtype=self.dtype)
+        outputs = np.empty((batch, steps, units), dtype=self.dtype) if layer["return_sequences"] else None
+
+        # Keras gate order: input, forget, cell, output
+        for t in range(steps):
+            z = projected[:, t] + h @ recurrent_kernel
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            g = activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if outputs is not None:
+                outputs[:, t] = h
+
+        return outputs if outputs is not None else h
+
+    def predict(self, features, verbose=0, batch_size=None):
+        """Run the forward pass on a (batch, steps, features) array, like keras Model.predict"""
+        x = np.asarray(features, dtype=self.dtype)
+        for layer in self.layers:
+            x = _round_to(x, layer["compute_dtype"])
+            if layer["type"] == "lstm":
+                x = self._lstm(layer, x)
+            else:
+                x = ACTIVATIONS[layer["activation"]](x @ self._weights(layer, "kernel") + self._weights(layer, "bias"))
+        return _round_to(x, self.layers[-1]["compute_dtype"]) if self.layers else x
@@ -0,0 +1,144 @@
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+STORE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'occupancy_store')
+
+INDEX_FILE = "index.json"
+DATES_FILE = "dates.npy"
+OCCUPANCY_FILE = "occupancy.npy"
+
+def source_fingerprint(csv_path):
+    """Identify a version of the source CSV by size and modification time"""
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def order_by_facility(df):
+    """Occupancy rows grouped by facility and sorted by date.
+
+    This is the row order every forecast window is read in, and the one the
+    model is trained on. Rows are not aggregated: a facility has one row per
+    program and day. The stable sort keeps same-day rows in file order.
+    """
+    df = df.dropna(subset=['FACILITY_NAME'])
+    return df.sort_values(['FACILITY_NAME', 'OCCUPANCY_DATE'], kind='stable')
+
+def compile_store(csv_path, store_dir=STORE_DIR):
+    """Compile the occupancy CSV into facility-sorted arrays plus an offset index"""
+    df = pd.read_csv(csv_path, usecols=['OCCUPANCY_DATE', 'FACILITY_NAME', 'OCCUPANCY'],
+                     parse_dates=['OCCUPANCY_DATE'])
+    df = order_by_facility(df)
+
+    names = df['FACILITY_NAME'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]]) if len(names) else np.array([], dtype=np.int64)
+    lengths = np.diff(np.r_[starts, len(names)])
+    facilities = {
+        str(names[start]): [int(start), int(length)]
+        for start, length in zip(starts, lengths)
+    }
+
+    os.makedirs(store_dir, exist_ok=True)
+    previous = _read_index(store_dir)
+
+    # Readers keep the arrays of the index they opened memory-mapped, so every
+    # compile writes new array files instead of rewriting mapped ones in place
+    generation = f"{time.time_ns()}-{os.getpid()}"
+    files = {
+        "dates": DATES_FILE.replace(".npy", f".{generation}.npy"),
+        "occupancy": OCCUPANCY_FILE.replace(".npy", f".{generation}.npy")
+    }
+    np.save(os.path.join(store_dir, files["dates"]), df['OCCUPANCY_DATE'].to_numpy(dtype='datetime64[ns]'))
+    np.save(os.path.join(store_dir, files["occupancy"]), df['OCCUPANCY'].to_numpy(dtype=np.float64))
+
+    # The index is written last so a half-written store is never considered current
+    index = {
+        "source": source_fingerprint(csv_path),
+        "rows": len(df),
+        "files": files,
+        "facilities": facilities
+    }
+    tmp_path = os.path.join(store_dir, INDEX_FILE + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(store_dir, INDEX_FILE))
+
+    # Arrays of the previous index stay for readers that opened it but have not
+    # mapped them yet; older generations are removed. Unlinking a mapped file
+    # leaves existing mappings intact (Windows refuses, and the file is kept).
+    keep = set(files.values()) | set(_array_files(previous).values())
+    for name in os.listdir(store_dir):
+        if name.endswith(".npy") and name not in keep:
+            try:
+                os.remove(os.path.join(store_dir, name))
+            except OSError:
+                pass
+
+    return index
+
+def _read_index(store_dir):
+    try:
+        with open(os.path.join(store_dir, INDEX_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def _array_files(index):
+    """Array file names an index refers to; stores compiled before versioning used fixed names"""
+    if index is None:
+        return {}
+    return index.get("files", {"dates": DATES_FILE, "occupancy": OCCUPANCY_FILE})
+
+def is_store_current(csv_path, store_dir=STORE_DIR):
+    """Check that a compiled store exists and was built from the current CSV"""
+    index_path = os.path.join(store_dir, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    with open(index_path) as f:
+        index = json.load(f)
+    return index.get("source") == source_fingerprint(csv_path)
+
+class OccupancyStore:
+    """Read-only view over a compiled occupancy store"""
+
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self._dates = None
+        self._occupancy = None
+
+    def _arrays(self):
+        # Memory-map lazily so listing facilities never touches the row data
+        if self._dates is None:
+            files = _array_files(self.index)
+            self._dates = np.load(os.path.join(self.store_dir, files["dates"]), mmap_mode='r')
+            self._occupancy = np.load(os.path.join(self.store_dir, files["occupancy"]), mmap_mode='r')
+        return self._dates, self._occupancy
+
+    def facilities(self):
+        """Return all facility names in sorted order"""
+        return list(self.index["facilities"])
+
+    def row_count(self, facility_name):
+        """Return the number of history rows for a facility (0 if unknown)"""
+        entry = self.index["facilities"].get(facility_name)
+        return entry[1] if entry else 0
+
+    def recent_rows(self, facility_name, n):
+        """Return the latest n rows for a facility as a small DataFrame"""
+        entry = self.index["facilities"].get(facility_name)
+        if entry is None:
+            return None
+        offset, length = entry
+        start = offset + max(length - n, 0)
+        end = offset + length
+        dates, occupancy = self._arrays()
+        return pd.DataFrame({
+            'OCCUPANCY_DATE': pd.to_datetime(np.asarray(dates[start:end])),
+            'FACILITY_NAME': facility_name,
+            'OCCUPANCY': np.asarray(occupancy[start:end])
+        })
@@ -1,131 +1,256 @@
 import pandas as pd
 import numpy as np
 import json
+import math
 import sys
 import os
+import tempfile
+import threading
 from datetime import datetime, timedelta
-import tensorflow as tf
-from tensorflow import keras
+from occupancy_store import (
+    OccupancyStore, STORE_DIR, INDEX_FILE, compile_store, is_store_current, order_by_facility
+)
+from forecast_cache import ForecastCache, file_version
+from forecast_store import FORECAST_STORE_PATH, ForecastStore
+from profiling import PhaseProfiler, profile_phase
+from window_state import (
+    WINDOW_STATE_PATH, WindowState, build_window_state, is_window_state_current, read_occupancy_updates
+)
 
-def load_model():
-    """Load the trained TensorFlow model"""
+MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'model.h5')
+NUMPY_MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'model.npz')
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'shelter_occupancy.csv')
+PREDICTIONS_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'predictions.json')
+FORECASTS_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'forecasts.json')
+
+# Heavy dependencies are imported inside the commands that need them so that
+# `shelters` only pays for pandas and only `forecast`/`serve` load a model stack
+# (see benchmarks/bench_startup.py for the measured cold-start budget).
+
+# Keras models are not safe to call from several threads at once, so the
+# forecast service serializes inference while request parsing stays parallel
+_inference_lock = threading.Lock()
+
+def quantized_model_path(mode):
+    """Location of the float16/int8 copy of model.h5"""
+    return os.path.join(os.path.dirname(MODEL_PATH), f"model.{mode}.npz")
+
+def load_model(backend=None):
+    """Load the trained model with the Keras or the NumPy inference backend"""
+    backend = backend or os.environ.get("FORECAST_BACKEND", "keras")
     try:
-        model_path = os.path.join(os.path.dirname(__file__), '..', 'model.h5')
+        if backend == "numpy":
+            # Pure NumPy forward pass: no TensorFlow import, prefers the exported .npz
+            from numpy_inference import NumpyModel
+            if os.path.exists(NUMPY_MODEL_PATH) and os.path.getmtime(NUMPY_MODEL_PATH) >= os.path.getmtime(MODEL_PATH):
+                return NumpyModel.from_npz(NUMPY_MODEL_PATH)
+            return NumpyModel.from_h5(MODEL_PATH)
+        if backend in ("numpy-float16", "numpy-int8"):
+            # Reduced-precision copy written by quantize_model.py; a copy older than
+            # model.h5 holds superseded weights, so it is requantized in memory instead
+            from numpy_inference import NumpyModel, quantize_layers, read_h5_layers
+            mode = backend.split("-")[1]
+            path = quantized_model_path(mode)
+            if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(MODEL_PATH):
+                return NumpyModel.from_npz(path)
+            print(f"{path} is missing or older than model.h5; quantizing model.h5 "
+                  f"(run quantize_model.py --mode {mode} to update it)", file=sys.stderr)
+            return NumpyModel(quantize_layers(read_h5_layers(MODEL_PATH), mode))
+        if backend != "keras":
+            raise ValueError(f"Unknown inference backend '{backend}'")
+        
+        from tensorflow import keras
+        from compiled_inference import CompiledModel
         
         # Load model without custom objects, just compile=False
-        model = keras.models.load_model(model_path, compile=False)
-        return model
+        model = keras.models.load_model(MODEL_PATH, compile=False)
+        
+        # Fixed-signature tf.function instead of model.predict; FORECAST_XLA=1 adds XLA
+        return CompiledModel(model, jit_compile=os.environ.get("FORECAST_XLA") == "1")
     except Exception as e:
         print(f"Error loading model: {e}", file=sys.stderr)
         return None
 
-def prepare_data_for_prediction(shelter_name, target_date, days_ahead=7):
-    """Prepare data for prediction for a specific shelter and target date"""
-    # Load the data
-    df = pd.read_csv("../data/shelter_occupancy.csv", parse_dates=["OCCUPANCY_DATE"])
+def load_occupancy_data():
+    """Load the shelter occupancy history"""
+    return pd.read_csv(DATA_PATH, parse_dates=["OCCUPANCY_DATE"])
+
+# Sources that answer recent_rows/row_count without scanning history
+INDEXED_SOURCES = (OccupancyStore, WindowState)
+
+def load_occupancy_source():
+    """Open the window state or compiled store when current, otherwise load the CSV"""
+    if is_window_state_current(DATA_PATH, WINDOW_STATE_PATH):
+        return WindowState.load(WINDOW_STATE_PATH)
+    if is_store_current(DATA_PATH, STORE_DIR):
+        return OccupancyStore(STORE_DIR)
+    return load_occupancy_data()
+
+def occupancy_data_version():
+    """Version of whichever occupancy source forecasts are computed from"""
+    if is_window_state_current(DATA_PATH, WINDOW_STATE_PATH):
+        # Changes on every append, so cached forecasts never outlive new rows
+        return "window-state:" + file_version(WINDOW_STATE_PATH)
+    if os.path.exists(DATA_PATH):
+        return file_version(DATA_PATH)
+    return file_version(os.path.join(STORE_DIR, INDEX_FILE))
+
+def select_recent_rows(df, shelter_name, n=30):
+    """Return a shelter's latest n rows and its total row count"""
+    if isinstance(df, INDEXED_SOURCES):
+        # O(n) slice through the facility offset index or the window ring buffer
+        row_count = df.row_count(shelter_name)
+        return (df.recent_rows(shelter_name, n) if row_count else None), row_count
     
     # Filter for the specific shelter
-    shelter_data = df[df['FACILITY_NAME'] == shelter_name].copy()
+    shelter_data = df[df['FACILITY_NAME'] == shelter_name]
     
-    if shelter_data.empty:
+    # Sort by date (stable, so same-day rows keep file order in every code path)
+    shelter_data = shelter_data.sort_values('OCCUPANCY_DATE', kind='stable')
+    return shelter_data.tail(n), len(shelter_data)
+
+def prepare_data_for_prediction(shelter_name, target_date, days_ahead=7, df=None):
+    """Prepare data for prediction for a specific shelter and target date"""
+    # Load the data unless the caller already holds it in memory
+    if df is None:
+        df = load_occupancy_source()
+    
+    # Get the last 30 data points (assuming model expects 30 time steps)
+    recent_data, row_count = select_recent_rows(df, shelter_name)
+    
+    if row_count == 0:
         return None, f"Shelter '{shelter_name}' not found in data"
     
-    # Sort by date
-    shelter_data = shelter_data.sort_values('OCCUPANCY_DATE')
+    if row_count < 30:
+        return None, f"Insufficient data for shelter '{shelter_name}'. Need at least 30 data points, got {row_count}"
     
-    # Get the latest 30 data points (assuming model expects 30 time steps)
-    if len(shelter_data) < 30:
-        return None, f"Insufficient data for shelter '{shelter_name}'. Need at least 30 data points, got {len(shelter_data)}"
+    # Build a (1, 30, 46) batch for single prediction
+    features_array = build_feature_windows(
+        recent_data['OCCUPANCY_DATE'].to_numpy()[np.newaxis],
+        recent_data['OCCUPANCY'].to_numpy()[np.newaxis]
+    )
     
-    # Get the last 30 data points
-    recent_data = shelter_data.tail(30)
+    return features_array, recent_data['OCCUPANCY_DATE'].iloc[-1]
+
+def build_feature_windows(dates, occupancy):
+    """Build the (n_windows, 30, 46) feature tensor from (n_windows, 30) date and occupancy arrays"""
+    days = np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    occupancy = np.asarray(occupancy, dtype=np.float64)
     
-    # Create features for each time step
     # This is a placeholder - you'll need to adjust based on your model's actual feature requirements
-    features = []
-    for _, row in recent_data.iterrows():
-        # Create a feature vector with 42 features (placeholder)
-        # You'll need to replace this with the actual features your model was trained on
-        feature_vector = []
-        
-        # Basic time features
-        feature_vector.extend([
-            row['OCCUPANCY_DATE'].weekday(),  # Day of week (0-6)
-            row['OCCUPANCY_DATE'].month,      # Month (1-12)
-            row['OCCUPANCY_DATE'].day,        # Day of month (1-31)
-            row['OCCUPANCY_DATE'].year,       # Year
-        ])
-        
-        # Occupancy features
-        feature_vector.extend([
-            row['OCCUPANCY'],                 # Current occupancy
-            row['OCCUPANCY'] / 100.0,         # Normalized occupancy
-        ])
-        
-        # Add more features to reach 46 total
-        # This is a placeholder - replace with actual features from your training
-        for i in range(40):  # 4 + 2 + 40 = 46 features
-            feature_vector.append(0.0)  # Placeholder features
-        
-        features.append(feature_vector)
+    features = np.zeros(days.shape + (46,), dtype=np.float32)
     
-    # Convert to numpy array and reshape to (1, 30, 46) for single prediction
-    features_array = np.array(features, dtype=np.float32)
-    features_array = features_array.reshape(1, 30, 46)
+    # Basic time features
+    features[..., 0] = (days.astype(np.int64) + 3) % 7                         # Day of week (0-6), 1970-01-01 was a Thursday
+    features[..., 1] = months.astype(np.int64) % 12 + 1                        # Month (1-12)
+    features[..., 2] = (days - months).astype(np.int64) + 1                    # Day of month (1-31)
+    features[..., 3] = days.astype('datetime64[Y]').astype(np.int64) + 1970    # Year
     
-    return features_array, recent_data['OCCUPANCY_DATE'].iloc[-1]
+    # Occupancy features
+    features[..., 4] = occupancy                                               # Current occupancy
+    features[..., 5] = occupancy / 100.0                                       # Normalized occupancy
+    
+    # Slots 6-45 are placeholder features that stay zero (4 + 2 + 40 = 46 features)
+    # This is a placeholder - replace with actual features from your training
+    return features
+
+def run_inference(model, features):
+    """Run one forward pass and return the (n_windows, n_outputs) model predictions"""
+    with _inference_lock:
+        prediction = model.predict(features, verbose=0)  # Suppress TensorFlow output
+    
+    # Single-output models predict a base occupancy per window; multi-horizon
+    # models (train_model.py --horizon H) predict day 1..H directly
+    return prediction if prediction.ndim > 1 else prediction[:, np.newaxis]
+
+def horizon_forecasts(outputs, target_dates):
+    """Turn one window's model outputs into integer forecasts for consecutive target dates"""
+    if len(outputs) == 1:
+        # Single-output model: the base prediction scaled by the weekday pattern
+        return [apply_day_variation(float(outputs[0]), target_date) for target_date in target_dates]
+    if len(target_dates) > len(outputs):
+        raise ValueError(f"Model forecasts at most {len(outputs)} days, requested {len(target_dates)}")
+    return [int(value) for value in outputs[:len(target_dates)]]
+
+def apply_day_variation(predicted_occupancy, target_date):
+    """Scale a base prediction by the weekday pattern of the target date"""
+    # Add some variation based on the target date to make predictions more realistic
+    # This simulates different patterns for different days of the week
+    day_of_week = target_date.weekday()
+    variation_factor = 1.0 + (day_of_week - 3) * 0.1  # Weekend vs weekday variation
+    predicted_occupancy *= variation_factor
+    
+    return int(predicted_occupancy)
 
-def predict_single_day(shelter_name, target_date):
+def predict_single_day(shelter_name, target_date, model=None, df=None):
     """Predict occupancy for a single specific date"""
-    model = load_model()
+    if model is None:
+        model = load_model()
     if model is None:
         return None, "Failed to load model"
     
     # Prepare data
-    features, latest_date = prepare_data_for_prediction(shelter_name, target_date)
+    features, latest_date = prepare_data_for_prediction(shelter_name, target_date, df=df)
     if features is None:
         return None, f"Failed to prepare data: {latest_date}"
     
     try:
-        # Make prediction
-        prediction = model.predict(features, verbose=0)  # Suppress TensorFlow output
-        
-        # The model might output a single value or multiple values
-        # For now, let's assume it outputs a single occupancy prediction
-        predicted_occupancy = float(prediction[0][0]) if prediction.ndim > 1 else float(prediction[0])
-        
-        # Add some variation based on the target date to make predictions more realistic
-        # This simulates different patterns for different days of the week
-        day_of_week = target_date.weekday()
-        variation_factor = 1.0 + (day_of_week - 3) * 0.1  # Weekend vs weekday variation
-        predicted_occupancy *= variation_factor
-        
-        return int(predicted_occupancy), None
+        outputs = run_inference(model, features)[0]
+        # Multi-horizon models need the forecast for every day up to the target
+        current_date = datetime.now().date()
+        days = max((target_date - current_date).days, 1) if len(outputs) > 1 else 1
+        target_dates = [current_date + timedelta(days=i + 1) for i in range(days - 1)] + [target_date]
+        return horizon_forecasts(outputs, target_dates)[-1], None
         
     except Exception as e:
         return None, f"Prediction failed: {str(e)}"
 
-def predict_forecast(shelter_name, days_ahead=7):
+def predict_forecast(shelter_name, days_ahead=7, model=None, df=None, backend=None, profiler=None):
     """Predict occupancy for the next N days for a specific shelter"""
     # Get current date
     current_date = datetime.now().date()
+    target_dates = [current_date + timedelta(days=i+1) for i in range(days_ahead)]
     
     forecast = []
     
-    for i in range(days_ahead):
-        target_date = current_date + timedelta(days=i+1)
+    if target_dates:
+        # The input window is the shelter's latest 30 days for every target date,
+        # so the whole horizon shares one model load, one data read and one forward pass
+        # (multi-horizon models emit every day of it from that pass)
+        error = None
+        if model is None:
+            with profile_phase(profiler, "model_load"):
+                model = load_model(backend)
+        if model is None:
+            error = "Failed to load model"
+        else:
+            if df is None:
+                with profile_phase(profiler, "data_load"):
+                    df = load_occupancy_source()
+            with profile_phase(profiler, "window_build"):
+                features, latest_date = prepare_data_for_prediction(shelter_name, target_dates[0], df=df)
+            if features is None:
+                error = f"Failed to prepare data: {latest_date}"
         
-        # Get prediction for this specific date
-        predicted_occupancy, error = predict_single_day(shelter_name, target_date)
+        if error is None:
+            try:
+                with profile_phase(profiler, "inference"):
+                    outputs = run_inference(model, features)[0]
+                values = horizon_forecasts(outputs, target_dates)
+            except Exception as e:
+                error = f"Prediction failed: {str(e)}"
         
         if error:
-            return {"error": f"Failed to predict for {target_date}: {error}"}
+            return {"error": f"Failed to predict for {target_dates[0]}: {error}"}
         
-        forecast.append({
-            "date": target_date.strftime("%Y-%m-%d"),
-            "day": i + 1,
-            "predicted_occupancy": predicted_occupancy
-        })
+        with profile_phase(profiler, "serialization"):
+            for i, (target_date, value) in enumerate(zip(target_dates, values)):
+                forecast.append({
+                    "date": target_date.strftime("%Y-%m-%d"),
+                    "day": i + 1,
+                    "predicted_occupancy": value
+                })
     
     return {
         "shelter": shelter_name,
@@ -136,37 +261,492 @@ def predict_forecast(shelter_name, days_ahead=7):
         "forecast_end_date": (current_date + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
     }
 
-def get_available_shelters():
+def model_version(backend=None):
+    """Identify the inference backend and model file forecasts come from"""
+    backend = backend or os.environ.get("FORECAST_BACKEND", "keras")
+    return f"{backend}:{file_version(MODEL_PATH)}"
+
+def open_forecast_cache(backend=None):
+    """Open the forecast cache keyed to the current data and model files"""
+    return ForecastCache(occupancy_data_version(), model_version(backend))
+
+def predict_forecast_cached(shelter_name, days_ahead=7, cache=None, **kwargs):
+    """Serve a forecast from the cache, computing and storing it on a miss"""
+    if cache is None:
+        cache = open_forecast_cache(kwargs.get("backend"))
+    forecast_date = datetime.now().date().strftime("%Y-%m-%d")
+    profiler = kwargs.get("profiler")
+    
+    with profile_phase(profiler, "cache_lookup"):
+        result = cache.get(shelter_name, days_ahead, forecast_date)
+    if result is None:
+        result = predict_forecast(shelter_name, days_ahead, **kwargs)
+        if "error" not in result:
+            with profile_phase(profiler, "cache_store"):
+                cache.put(shelter_name, days_ahead, forecast_date, result)
+    return result
+
+def get_available_shelters(df=None):
     """Get list of available shelters"""
-    df = pd.read_csv("../data/shelter_occupancy.csv")
-    shelters = df['FACILITY_NAME'].unique().tolist()
+    if df is None:
+        if is_window_state_current(DATA_PATH, WINDOW_STATE_PATH):
+            df = WindowState.load(WINDOW_STATE_PATH)
+        elif is_store_current(DATA_PATH, STORE_DIR):
+            # Listing only needs the facility index, never the row data
+            df = OccupancyStore(STORE_DIR)
+        else:
+            df = pd.read_csv(DATA_PATH, usecols=['FACILITY_NAME'])
+    if isinstance(df, INDEXED_SOURCES):
+        return {"shelters": df.facilities()}
+    shelters = df['FACILITY_NAME'].dropna().unique().tolist()
     return {"shelters": sorted(shelters)}
 
+# Environment variables that size the native thread pools of NumPy's BLAS and TensorFlow
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS")
+
+_worker_model = None
+
+def configure_inference_threads(backend, threads):
+    """Pin the inference thread pools of this process to a fixed size"""
+    backend = backend or os.environ.get("FORECAST_BACKEND", "keras")
+    if backend == "keras":
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def _init_forecast_worker(backend, threads):
+    global _worker_model
+    configure_inference_threads(backend, threads)
+    _worker_model = load_model(backend)
+
+def _forecast_worker(features):
+    # Raising here rather than in the initializer lets the pool report the
+    # failure instead of endlessly respawning workers
+    if _worker_model is None:
+        raise RuntimeError("Failed to load model in forecast worker")
+    return run_inference(_worker_model, features)
+
+def run_parallel_inference(batch, workers, batch_size=256, backend=None):
+    """Shard a window batch across worker processes and merge predictions in order"""
+    import multiprocessing
+    
+    # Split the cores between workers so their thread pools never oversubscribe
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    # Every worker gets a share of the batch even when it is smaller than batch_size
+    chunk_size = max(1, min(batch_size, math.ceil(len(batch) / workers)))
+    chunks = [batch[start:start + chunk_size] for start in range(0, len(batch), chunk_size)]
+    
+    # BLAS pools are sized when NumPy is imported, so the limits must be in the
+    # environment the spawned workers start with
+    saved = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    os.environ.update({name: str(threads) for name in THREAD_ENV_VARS})
+    try:
+        # TensorFlow is not fork-safe, so workers always start from a clean interpreter
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers, initializer=_init_forecast_worker, initargs=(backend, threads)) as pool:
+            results = pool.map(_forecast_worker, chunks)
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    
+    return np.concatenate(results) if results else np.empty((0, 1))
+
+def write_json_atomic(path, payload):
+    """Write JSON to a temporary file and rename it over the target"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(payload, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def forecast_all_shelters(days_ahead=7, batch_size=256, model=None, df=None,
+                          output_path=PREDICTIONS_PATH, detail_path=FORECASTS_PATH, backend=None, profiler=None,
+                          workers=1, store_path=FORECAST_STORE_PATH):
+    """Forecast every shelter in one batched pass and publish the results"""
+    current_date = datetime.now().date()
+    # Captured before reading so the publication describes the data it was computed from
+    data_version = occupancy_data_version()
+    target_dates = [current_date + timedelta(days=i+1) for i in range(days_ahead)]
+    
+    # With several workers each process loads its own model, so the parent skips it
+    if model is None and workers <= 1:
+        with profile_phase(profiler, "model_load"):
+            model = load_model(backend)
+        if model is None:
+            return {"error": "Failed to load model"}
+    if df is None:
+        with profile_phase(profiler, "data_load"):
+            df = load_occupancy_source()
+    
+    with profile_phase(profiler, "window_build"):
+        if isinstance(df, WindowState):
+            # The ring buffers already hold every shelter's latest window
+            counts = pd.Series({name: df.row_count(name) for name in df.facilities()}, dtype=np.int64)
+            eligible = counts[counts >= 30].index
+            recent = None
+        elif isinstance(df, OccupancyStore):
+            # The store is already facility-sorted, so each window is an index slice
+            counts = pd.Series({name: df.row_count(name) for name in df.facilities()}, dtype=np.int64)
+            eligible = counts[counts >= 30].index
+            recent = pd.concat([df.recent_rows(name, 30) for name in eligible]) if len(eligible) else None
+        else:
+            # One sort and one groupby produce every shelter's latest window
+            ordered = order_by_facility(df)
+            counts = ordered.groupby('FACILITY_NAME', sort=True).size()
+            eligible = counts[counts >= 30].index
+            recent = ordered[ordered['FACILITY_NAME'].isin(eligible)].groupby('FACILITY_NAME', sort=True).tail(30)
+        
+        skipped = [{
+            "shelter": shelter_name,
+            "reason": f"Insufficient data. Need at least 30 data points, got {count}"
+        } for shelter_name, count in counts[counts < 30].items()]
+        names = list(eligible)
+        
+        # Every eligible shelter contributes exactly 30 contiguous rows, so the
+        # windows are a reshape of the selected columns
+        latest_dates = []
+        if names:
+            if recent is None:
+                dates, occupancy = df.windows(names)
+            else:
+                dates = recent['OCCUPANCY_DATE'].to_numpy().reshape(len(names), 30)
+                occupancy = recent['OCCUPANCY'].to_numpy().reshape(len(names), 30)
+            batch = build_feature_windows(dates, occupancy)
+            latest_dates = pd.to_datetime(dates[:, -1])
+    
+    if not names:
+        # Publishing nothing would replace the last good forecasts and prune a good version
+        return {"error": f"No shelter has at least 30 data points ({len(skipped)} skipped); "
+                         "previous forecasts were left in place"}
+    
+    with profile_phase(profiler, "inference"):
+        if workers > 1 and names:
+            try:
+                outputs = run_parallel_inference(batch, workers, batch_size, backend)
+            except RuntimeError as e:
+                return {"error": str(e)}
+        elif names:
+            outputs = np.concatenate([
+                run_inference(model, batch[start:start + batch_size])
+                for start in range(0, len(names), batch_size)
+            ])
+        else:
+            outputs = np.empty((0, 1))
+    if outputs.shape[1] > 1 and days_ahead > outputs.shape[1]:
+        return {"error": f"Model forecasts at most {outputs.shape[1]} days, requested {days_ahead}"}
+    
+    with profile_phase(profiler, "serialization"):
+        predictions = []
+        shelters = []
+        for shelter_name, latest_date, shelter_outputs in zip(names, latest_dates, outputs):
+            forecast = [{
+                "date": target_date.strftime("%Y-%m-%d"),
+                "day": i + 1,
+                "predicted_occupancy": value
+            } for i, (target_date, value) in enumerate(zip(target_dates, horizon_forecasts(shelter_outputs, target_dates)))]
+            shelters.append({
+                "shelter": shelter_name,
+                "latest_data_date": latest_date.strftime("%Y-%m-%d"),
+                "forecast": forecast
+            })
+            if forecast:
+                predictions.append({"name": shelter_name, "predicted_influx": forecast[0]["predicted_occupancy"]})
+        
+        generated_at = datetime.now().isoformat()
+        write_json_atomic(detail_path, {
+            "generated_at": generated_at,
+            "current_date": current_date.strftime("%Y-%m-%d"),
+            "days": days_ahead,
+            "shelters": shelters,
+            "skipped": skipped
+        })
+        write_json_atomic(output_path, predictions)
+        
+        version = None
+        if store_path:
+            version = ForecastStore(store_path).publish(
+                model_version(backend), data_version, generated_at,
+                current_date.strftime("%Y-%m-%d"), days_ahead, shelters
+            )
+    
+    return {
+        "generated_at": generated_at,
+        "forecasted": len(shelters),
+        "skipped": len(skipped),
+        "predictions_file": os.path.abspath(output_path),
+        "forecasts_file": os.path.abspath(detail_path),
+        "store_version": version
+    }
+
+def make_forecast_handler(model, df, cache=None, store=None):
+    """Build an HTTP handler class bound to an already loaded model and dataset"""
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlparse, parse_qs
+    
+    shelters = get_available_shelters(df)
+
+    class ForecastRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+
+            if url.path == "/health":
+                self.send_json(200, {"status": "ok", "shelters": len(shelters["shelters"])})
+            elif url.path == "/shelters":
+                self.send_json(200, shelters)
+            elif url.path == "/forecast":
+                shelter_name = query.get("shelter", [None])[0]
+                if not shelter_name:
+                    self.send_json(400, {"error": "Shelter name required for forecast"})
+                    return
+                try:
+                    days = int(query.get("days", ["7"])[0])
+                except ValueError:
+                    self.send_json(400, {"error": "days must be an integer"})
+                    return
+                if cache is None:
+                    result = predict_forecast(shelter_name, days, model=model, df=df)
+                else:
+                    result = predict_forecast_cached(shelter_name, days, cache=cache, model=model, df=df)
+                self.send_json(200, result)
+            elif url.path == "/published" and store is not None:
+                # Indexed lookup into the latest forecast-all publication
+                try:
+                    horizon = int(query["horizon"][0]) if "horizon" in query else None
+                except ValueError:
+                    self.send_json(400, {"error": "horizon must be an integer"})
+                    return
+                version, forecasts = store.query(
+                    shelter=query.get("shelter", [None])[0],
+                    forecast_date=query.get("date", [None])[0],
+                    horizon=horizon
+                )
+                self.send_json(200, {"version": version, "forecasts": forecasts})
+            else:
+                self.send_json(404, {"error": f"Unknown path: {url.path}"})
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Unix socket peers have no address, so log the request line only
+            print(f"[forecast-service] {format % args}", file=sys.stderr)
+
+    return ForecastRequestHandler
+
+def serve_forecasts(host="127.0.0.1", port=8765, socket_path=None, backend=None, use_cache=True):
+    """Run a long-lived forecast service that keeps the model and data warm"""
+    from http.server import ThreadingHTTPServer
+    from socketserver import ThreadingUnixStreamServer
+    
+    model = load_model(backend)
+    if model is None:
+        print("Error: Failed to load model", file=sys.stderr)
+        return
+    # Versions are captured before loading so cached entries describe what is served
+    cache = open_forecast_cache(backend) if use_cache else None
+    df = load_occupancy_source()
+    if hasattr(model, "warmup"):
+        model.warmup()
+    handler = make_forecast_handler(model, df, cache, ForecastStore(FORECAST_STORE_PATH))
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixStreamServer(socket_path, handler)
+        server.daemon_threads = True
+        print(f"Forecast service listening on unix:{socket_path}", file=sys.stderr)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        print(f"Forecast service listening on http://{host}:{port}", file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+def serialize_result(result, profiler=None):
+    """Serialize a command result, attaching the phase profile when profiling"""
+    with profile_phase(profiler, "output"):
+        output = json.dumps(result, indent=2)
+    if profiler is None:
+        return output
+    return json.dumps({**result, "profile": profiler.report()}, indent=2)
+
+# Switches that never take a value, so an argument after them stays positional
+BOOLEAN_FLAGS = {"no-cache", "profile", "trace-python", "xla", "no-store", "mixed-precision"}
+
+def parse_options(args):
+    """Split command line arguments into positionals and --key value options"""
+    positional = []
+    options = {}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.startswith("--"):
+            key = arg[2:]
+            if key not in BOOLEAN_FLAGS and i + 1 < len(args) and not args[i + 1].startswith("--"):
+                options[key] = args[i + 1]
+                i += 2
+                continue
+            options[key] = True
+        else:
+            positional.append(arg)
+        i += 1
+    return positional, options
+
 def main():
     """Main function to handle command line arguments"""
     if len(sys.argv) < 2:
-        print("Usage: python predict.py <command> [shelter_name] [days]")
+        print("Usage: python predict.py <command> [shelter_name] [days] [--backend keras|numpy|numpy-float16|numpy-int8] [--xla]")
         print("Commands:")
         print("  shelters - List available shelters")
-        print("  forecast <shelter_name> [days] - Get forecast for shelter (default 7 days)")
+        print("  forecast <shelter_name> [days] [--no-cache] [--profile [--trace-python]] - Get forecast for shelter (default 7 days)")
+        print("  forecast-all [days] [--profile [--trace-python]] [--workers N] [--batch-size N] [--output PATH] [--detail-output PATH] [--store PATH | --no-store] - Forecast every shelter and publish the results")
+        print("  query-forecasts [--shelter NAME] [--date YYYY-MM-DD] [--horizon N] [--model-version V] - Look up published forecasts")
+        print("  forecast-versions [--activate VERSION] - List published forecast versions or roll back to one")
+        print("  compile-store [--output DIR] - Compile the occupancy CSV into the indexed columnar store")
+        print("  build-window-state [--output PATH] - Build the per-shelter rolling window state from the history")
+        print("  append-occupancy <file.csv|file.json> [--state PATH] - Append new occupancy rows to the window state")
+        print("  serve [--host HOST] [--port PORT] [--socket PATH] [--no-cache] - Run the warm forecast service")
+        print("  cache-stats | cache-clear - Inspect or empty the forecast result cache")
+        print("  export-npz [--output PATH] - Export model.h5 weights for the NumPy backend")
         return
     
     command = sys.argv[1]
     
+    # Exported so forecast-all workers inherit it as well
+    if "--xla" in sys.argv[2:]:
+        os.environ["FORECAST_XLA"] = "1"
+    
     if command == "shelters":
         result = get_available_shelters()
         print(json.dumps(result, indent=2))
     
     elif command == "forecast":
-        if len(sys.argv) < 3:
+        positional, options = parse_options(sys.argv[2:])
+        if not positional:
             print("Error: Shelter name required for forecast")
             return
         
-        shelter_name = sys.argv[2]
-        days = int(sys.argv[3]) if len(sys.argv) > 3 else 7
+        shelter_name = positional[0]
+        days = int(positional[1]) if len(positional) > 1 else 7
         
-        result = predict_forecast(shelter_name, days)
-        print(json.dumps(result, indent=2))
+        profiler = PhaseProfiler(trace_python=bool(options.get("trace-python"))) if options.get("profile") else None
+        if options.get("no-cache"):
+            result = predict_forecast(shelter_name, days, backend=options.get("backend"), profiler=profiler)
+        else:
+            result = predict_forecast_cached(shelter_name, days, backend=options.get("backend"), profiler=profiler)
+        print(serialize_result(result, profiler))
+    
+    elif command == "forecast-all":
+        positional, options = parse_options(sys.argv[2:])
+        days = int(positional[0]) if positional else 7
+        
+        profiler = PhaseProfiler(trace_python=bool(options.get("trace-python"))) if options.get("profile") else None
+        result = forecast_all_shelters(
+            days,
+            batch_size=int(options.get("batch-size", 256)),
+            output_path=options.get("output", PREDICTIONS_PATH),
+            detail_path=options.get("detail-output", FORECASTS_PATH),
+            backend=options.get("backend"),
+            profiler=profiler,
+            workers=int(options.get("workers", 1)),
+            store_path=None if options.get("no-store") else options.get("store", FORECAST_STORE_PATH)
+        )
+        print(serialize_result(result, profiler))
+    
+    elif command == "query-forecasts":
+        _, options = parse_options(sys.argv[2:])
+        version, forecasts = ForecastStore(options.get("store", FORECAST_STORE_PATH)).query(
+            shelter=options.get("shelter"),
+            forecast_date=options.get("date"),
+            horizon=int(options["horizon"]) if "horizon" in options else None,
+            model_version=options.get("model-version")
+        )
+        print(json.dumps({"version": version, "forecasts": forecasts}, indent=2))
+    
+    elif command == "forecast-versions":
+        _, options = parse_options(sys.argv[2:])
+        store = ForecastStore(options.get("store", FORECAST_STORE_PATH))
+        if "activate" in options:
+            try:
+                store.activate(int(options["activate"]))
+            except ValueError as e:
+                print(f"Error: {e}")
+                return
+        print(json.dumps(store.versions(), indent=2))
+    
+    elif command == "compile-store":
+        _, options = parse_options(sys.argv[2:])
+        index = compile_store(DATA_PATH, options.get("output", STORE_DIR))
+        print(json.dumps({"rows": index["rows"], "facilities": len(index["facilities"])}, indent=2))
+    
+    elif command == "build-window-state":
+        _, options = parse_options(sys.argv[2:])
+        output_path = options.get("output", WINDOW_STATE_PATH)
+        df = OccupancyStore(STORE_DIR) if is_store_current(DATA_PATH, STORE_DIR) else load_occupancy_data()
+        state = build_window_state(df, DATA_PATH)
+        state.save(output_path)
+        print(json.dumps({"facilities": len(state.names), "state": os.path.abspath(output_path)}, indent=2))
+    
+    elif command == "append-occupancy":
+        positional, options = parse_options(sys.argv[2:])
+        if not positional:
+            print("Error: File with new occupancy rows required")
+            return
+        state_path = options.get("state", WINDOW_STATE_PATH)
+        if not os.path.exists(state_path):
+            print(f"Error: No window state at {state_path}; run build-window-state first")
+            return
+        state = WindowState.load(state_path)
+        summary = state.append_rows(read_occupancy_updates(positional[0]))
+        state.save(state_path)
+        print(json.dumps(summary, indent=2))
+    
+    elif command == "serve":
+        _, options = parse_options(sys.argv[2:])
+        serve_forecasts(
+            host=options.get("host", "127.0.0.1"),
+            port=int(options.get("port", 8765)),
+            socket_path=options.get("socket"),
+            backend=options.get("backend"),
+            use_cache=not options.get("no-cache")
+        )
+    
+    elif command == "cache-stats":
+        print(json.dumps(open_forecast_cache().stats(), indent=2))
+    
+    elif command == "cache-clear":
+        cache = open_forecast_cache()
+        cache.clear()
+        print(json.dumps(cache.stats(), indent=2))
+    
+    elif command == "export-npz":
+        from numpy_inference import NumpyModel
+        _, options = parse_options(sys.argv[2:])
+        output_path = options.get("output", NUMPY_MODEL_PATH)
+        NumpyModel.from_h5(MODEL_PATH).save_npz(output_path)
+        print(json.dumps({"model": os.path.abspath(MODEL_PATH), "exported": os.path.abspath(output_path)}, indent=2))
     
     else:
         print(f"Unknown command: {command}")
@@ -0,0 +1,64 @@
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+def _max_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return round(max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+class PhaseProfiler:
+    """Record wall time, CPU time and peak memory for named phases of a run.
+
+    process_peak_rss_mb is the process-wide RSS high-water mark when the phase
+    ends, which also covers native allocations such as TensorFlow's. With
+    trace_python=True each phase also reports python_peak_mb, the tracemalloc
+    high-water mark of Python and NumPy allocations inside it; tracing slows
+    every allocation, so the timings of a traced run are inflated.
+    """
+
+    def __init__(self, trace_python=False):
+        self.phases = []
+        self.trace_python = trace_python
+        self._started = time.perf_counter()
+        self._started_cpu = time.process_time()
+        if trace_python and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        if self.trace_python:
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                "phase": name,
+                "wall_ms": round((time.perf_counter() - wall_start) * 1000, 3),
+                "cpu_ms": round((time.process_time() - cpu_start) * 1000, 3)
+            }
+            if self.trace_python:
+                record["python_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 3)
+            record["process_peak_rss_mb"] = _max_rss_mb()
+            self.phases.append(record)
+
+    def report(self):
+        """Return the recorded phases plus run totals as a JSON-serializable dict"""
+        return {
+            "phases": self.phases,
+            "total_wall_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "total_cpu_ms": round((time.process_time() - self._started_cpu) * 1000, 3),
+            "process_peak_rss_mb": _max_rss_mb()
+        }
+
+def profile_phase(profiler, name):
+    """Time a phase when profiling is enabled, otherwise do nothing"""
+    return profiler.phase(name) if profiler is not None else nullcontext()
@@ -0,0 +1,99 @@
+"""Write a float16 or int8 copy of model.h5 and report its accuracy and latency.
+
+Usage: python model/quantize_model.py [--mode float16|int8|all] [--report PATH]
+
+The copies are loaded by predict.py with --backend numpy-float16 / numpy-int8.
+Accuracy is measured against the float32 NumPy forward pass on the latest window of
+every shelter in the occupancy data (or on random windows when no data is present).
+"""
+import json
+import os
+import sys
+import time
+import numpy as np
+from predict import (
+    INDEXED_SOURCES, MODEL_PATH, build_feature_windows, load_occupancy_source, parse_options,
+    quantized_model_path, select_recent_rows
+)
+from numpy_inference import NumpyModel, quantize_layers, read_h5_layers
+
+def evaluation_windows(max_windows=2048):
+    """Latest windows of real shelters, falling back to random windows"""
+    try:
+        source = load_occupancy_source()
+    except FileNotFoundError:
+        source = None
+
+    if source is not None:
+        if isinstance(source, INDEXED_SOURCES):
+            names = source.facilities()
+        else:
+            names = sorted(source['FACILITY_NAME'].dropna().unique())
+        dates, occupancy = [], []
+        for name in names[:max_windows]:
+            recent, row_count = select_recent_rows(source, name)
+            if row_count >= 30:
+                dates.append(recent['OCCUPANCY_DATE'].to_numpy())
+                occupancy.append(recent['OCCUPANCY'].to_numpy())
+        if dates:
+            return build_feature_windows(np.stack(dates), np.stack(occupancy)), "occupancy data"
+
+    rng = np.random.default_rng(0)
+    starts = np.datetime64('2017-01-01') + rng.integers(0, 1500, max_windows).astype('timedelta64[D]')
+    dates = starts[:, np.newaxis] + np.arange(30).astype('timedelta64[D]')
+    return build_feature_windows(dates, rng.integers(0, 400, (max_windows, 30))), "random windows"
+
+def best_time(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def evaluate(model, reference, windows):
+    """Compare a model with the float32 reference on the same windows"""
+    predictions = model.predict(windows)
+    errors = np.abs(predictions - reference)
+    return {
+        "weight_bytes": model.weight_bytes(),
+        "max_abs_error": round(float(errors.max()), 4),
+        "mean_abs_error": round(float(errors.mean()), 4),
+        "integer_mismatch_rate": round(float(np.mean(predictions.astype(int) != reference.astype(int))), 4),
+        "latency_1_window_ms": round(best_time(lambda: model.predict(windows[:1])) * 1000, 3),
+        f"latency_{len(windows)}_windows_ms": round(best_time(lambda: model.predict(windows)) * 1000, 3)
+    }
+
+def main():
+    _, options = parse_options(sys.argv[1:])
+    mode = options.get("mode", "int8")
+    modes = ["float16", "int8"] if mode == "all" else [mode]
+
+    layers = read_h5_layers(MODEL_PATH)
+    baseline = NumpyModel(layers)
+    windows, window_source = evaluation_windows()
+    reference = baseline.predict(windows)
+
+    report = {
+        "model": os.path.abspath(MODEL_PATH),
+        "windows": len(windows),
+        "window_source": window_source,
+        "float32": evaluate(baseline, reference, windows)
+    }
+    for quantization in modes:
+        output_path = quantized_model_path(quantization)
+        model = NumpyModel(quantize_layers(layers, quantization))
+        model.save_npz(output_path)
+        # Evaluate the saved file so the report reflects what workers will load
+        report[quantization] = evaluate(NumpyModel.from_npz(output_path), reference, windows)
+        report[quantization]["file"] = os.path.abspath(output_path)
+        report[quantization]["file_bytes"] = os.path.getsize(output_path)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if "report" in options:
+        with open(options["report"], "w") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
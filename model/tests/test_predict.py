@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import predict
+
+@pytest.fixture
+def occupancy_csv(tmp_path, monkeypatch):
+    dates = pd.date_range('2019-01-01', periods=60)
+    pd.DataFrame({
+        'OCCUPANCY_DATE': dates.strftime('%Y-%m-%d'),
+        'FACILITY_NAME': 'Shelter 00',
+        'OCCUPANCY': np.arange(60) % 40 + 50
+    }).to_csv(tmp_path / 'shelter_occupancy.csv', index=False)
+    monkeypatch.setattr(predict, 'DATA_PATH', str(tmp_path / 'shelter_occupancy.csv'))
+    monkeypatch.setattr(predict, 'STORE_DIR', str(tmp_path / 'no_store'))
+    monkeypatch.setattr(predict, 'WINDOW_STATE_PATH', str(tmp_path / 'no_window_state.npz'))
+
+@pytest.mark.parametrize('args, positional, options', [
+    (['Shelter 00', '--no-cache', '14'], ['Shelter 00', '14'], {'no-cache': True}),
+    (['--profile', '14', '--trace-python'], ['14'], {'profile': True, 'trace-python': True}),
+    (['14', '--backend', 'numpy', '--no-store'], ['14'], {'backend': 'numpy', 'no-store': True}),
+    (['--xla', '3', '--workers', '2'], ['3'], {'xla': True, 'workers': '2'}),
+])
+def test_parse_options_boolean_flags_take_no_value(args, positional, options):
+    assert predict.parse_options(args) == (positional, options)
+
+def test_forecast_days_after_no_cache_flag(occupancy_csv, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['predict.py', 'forecast', 'Shelter 00', '--no-cache', '14', '--backend', 'numpy'])
+    predict.main()
+    result = json.loads(capsys.readouterr().out)
+    assert len(result['forecast']) == 14
+
+def test_forecast_all_keeps_previous_publication_when_every_shelter_is_skipped(occupancy_csv, tmp_path):
+    paths = {
+        'output_path': str(tmp_path / 'predictions.json'),
+        'detail_path': str(tmp_path / 'forecasts.json'),
+        'store_path': str(tmp_path / 'forecast_store.sqlite')
+    }
+    published = predict.forecast_all_shelters(7, backend='numpy', **paths)
+    assert published['forecasted'] == 1
+    with open(paths['output_path']) as f:
+        predictions = json.load(f)
+
+    pd.DataFrame({
+        'OCCUPANCY_DATE': ['2019-01-01'], 'FACILITY_NAME': ['Shelter 00'], 'OCCUPANCY': [50]
+    }).to_csv(predict.DATA_PATH, index=False)
+    result = predict.forecast_all_shelters(7, backend='numpy', **paths)
+
+    assert 'error' in result
+    with open(paths['output_path']) as f:
+        assert json.load(f) == predictions
+    version, forecasts = predict.ForecastStore(paths['store_path']).query(shelter='Shelter 00')
+    assert version == published['store_version'] and len(forecasts) == 7
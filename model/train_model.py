@@ -0,0 +1,207 @@
+"""Train the occupancy LSTM and export it as model.h5.
+
+Usage: python model/train_model.py [--data PATH] [--output PATH] [--epochs N] [--batch-size N]
+                                   [--horizon H] [--val-fraction F] [--mixed-precision] [--seed N]
+
+Training windows are the ones predict.py reads at serve time: the raw occupancy
+rows of each facility in occupancy_store.order_by_facility order, one row per
+program and day, without aggregation. By default they come from the same
+shelter_occupancy.csv the forecast commands read.
+
+Windows are never materialized: the feature rows of every facility are
+built once with predict.build_feature_windows, and a tf.data pipeline gathers
+shuffled batches of (30, 46) windows from that table in parallel map calls with
+prefetching. Training runs on standardized inputs and targets; the scaling is
+folded back into the first LSTM and the output layer before export, so the saved
+model reads the same raw features predict.py builds.
+
+With --horizon H the output layer has H units trained on the next H rows of the
+facility (the next H days for a single-program facility), and predict.py uses
+them as the day 1..H forecast instead of scaling one base prediction by a
+weekday factor.
+"""
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from occupancy_store import order_by_facility
+from predict import DATA_PATH, MODEL_PATH, build_feature_windows, parse_options
+
+PREPROCESSED_PATH = os.path.join(
+    os.path.dirname(__file__), '..', 'backend', 'ML-LLM-hybrid-recommendation-system', 'data', 'shelter_master.csv'
+)
+
+WINDOW = 30
+N_FEATURES = 46
+
+# build_feature_windows only fills the first slots; the rest are zero placeholders
+ACTIVE_FEATURES = 6
+
+def load_occupancy_rows(path):
+    """Load occupancy rows in the facility/date order forecast windows are read in"""
+    df = pd.read_csv(path, usecols=['OCCUPANCY_DATE', 'FACILITY_NAME', 'OCCUPANCY'], parse_dates=['OCCUPANCY_DATE'])
+    df = df.dropna(subset=['OCCUPANCY_DATE', 'FACILITY_NAME', 'OCCUPANCY'])
+    return order_by_facility(df).reset_index(drop=True)
+
+def window_index(rows, horizon=1):
+    """Per-row feature table plus the start row of every window that has `horizon` target rows"""
+    names = rows['FACILITY_NAME'].to_numpy()
+    dates = rows['OCCUPANCY_DATE'].to_numpy(dtype='datetime64[ns]')
+    occupancy = rows['OCCUPANCY'].to_numpy(dtype=np.float64)
+
+    table = build_feature_windows(dates, occupancy)[:, :ACTIVE_FEATURES]
+
+    # A window starting at row i covers rows i..i+29 of one facility and predicts
+    # rows i+30..i+29+horizon of the same facility
+    starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]])
+    lengths = np.diff(np.r_[starts, len(names)])
+    counts = np.maximum(lengths - WINDOW - horizon + 1, 0)
+    window_starts = np.repeat(starts, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return table, occupancy.astype(np.float32), dates, window_starts
+
+def make_dataset(table, targets, starts, batch_size, shuffle, seed, horizon=1):
+    """Stream (batch, 30, 46) windows and (batch, horizon) targets gathered from the row table"""
+    import tensorflow as tf
+
+    table = tf.constant(table)
+    targets = tf.constant(targets)
+    offsets = tf.range(WINDOW, dtype=tf.int64)
+    target_offsets = tf.range(WINDOW, WINDOW + horizon, dtype=tf.int64)
+
+    def gather(batch_starts):
+        windows = tf.gather(table, batch_starts[:, tf.newaxis] + offsets)
+        windows = tf.pad(windows, [[0, 0], [0, 0], [0, N_FEATURES - ACTIVE_FEATURES]])
+        return windows, tf.gather(targets, batch_starts[:, tf.newaxis] + target_offsets)
+
+    dataset = tf.data.Dataset.from_tensor_slices(starts.astype(np.int64))
+    if shuffle:
+        # Only the start indices are shuffled, so the buffer stays a few bytes per window
+        dataset = dataset.shuffle(len(starts), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(gather, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+def build_model(horizon=1, mixed_precision=False):
+    """Same layer stack as the original model.h5"""
+    from tensorflow import keras
+
+    # After folding, the first layer multiplies raw years (~2020) by small weights and
+    # cancels them against its bias, which float16 cannot do accurately
+    first_dtype = "float32" if mixed_precision else None
+    return keras.Sequential([
+        keras.Input(shape=(WINDOW, N_FEATURES)),
+        keras.layers.LSTM(128, return_sequences=True, dtype=first_dtype),
+        keras.layers.Dropout(0.2),
+        keras.layers.LSTM(64),
+        keras.layers.Dropout(0.2),
+        keras.layers.Dense(32, activation='relu'),
+        keras.layers.Dropout(0.1),
+        keras.layers.Dense(horizon, activation='linear')
+    ])
+
+def fold_scaling(model, feature_mean, feature_std, target_mean, target_std):
+    """Absorb input standardization and target scaling into the model weights"""
+    first = model.layers[0]
+    kernel, recurrent_kernel, bias = first.get_weights()
+    # (x - mean) / std @ K + b == x @ (K / std) + (b - (mean / std) @ K)
+    first.set_weights([
+        kernel / feature_std[:, np.newaxis],
+        recurrent_kernel,
+        bias - (feature_mean / feature_std) @ kernel
+    ])
+    last = model.layers[-1]
+    kernel, bias = last.get_weights()
+    last.set_weights([kernel * target_std, bias * target_std + target_mean])
+
+def train(data_path, output_path, epochs=10, batch_size=256, horizon=1, val_fraction=0.1,
+          mixed_precision=False, seed=0):
+    import tensorflow as tf
+    from tensorflow import keras
+
+    started = time.perf_counter()
+    tf.keras.utils.set_random_seed(seed)
+    if mixed_precision:
+        keras.mixed_precision.set_global_policy("mixed_float16")
+
+    rows = load_occupancy_rows(data_path)
+    table, occupancy, dates, starts = window_index(rows, horizon)
+    if len(starts) == 0:
+        raise ValueError(f"No facility in {data_path} has at least {WINDOW + horizon} rows of history")
+
+    # Chronological split on the last target date keeps training targets strictly
+    # before the validation period
+    target_dates = dates[starts + WINDOW + horizon - 1]
+    cutoff = np.quantile(target_dates.astype(np.int64), 1.0 - val_fraction).astype('datetime64[ns]')
+    train_starts = starts[target_dates < cutoff]
+    val_starts = starts[target_dates >= cutoff]
+
+    # Statistics come from rows before the validation period only
+    train_rows = table[dates < cutoff]
+    feature_mean = np.zeros(N_FEATURES, dtype=np.float64)
+    feature_std = np.ones(N_FEATURES, dtype=np.float64)
+    feature_mean[:ACTIVE_FEATURES] = train_rows.mean(axis=0)
+    std = train_rows.std(axis=0)
+    feature_std[:ACTIVE_FEATURES] = np.where(std > 0, std, 1.0)
+    target_mean = float(occupancy[train_starts + WINDOW].mean())
+    target_std = float(occupancy[train_starts + WINDOW].std()) or 1.0
+
+    scaled_table = ((table - feature_mean[:ACTIVE_FEATURES]) / feature_std[:ACTIVE_FEATURES]).astype(np.float32)
+    scaled_targets = ((occupancy - target_mean) / target_std).astype(np.float32)
+    train_data = make_dataset(scaled_table, scaled_targets, train_starts, batch_size, True, seed, horizon)
+    val_data = None
+    if len(val_starts):
+        val_data = make_dataset(scaled_table, scaled_targets, val_starts, batch_size, False, seed, horizon)
+
+    model = build_model(horizon, mixed_precision)
+    model.compile(optimizer=keras.optimizers.Adam(1e-3), loss='mse', metrics=['mae'])
+    monitor = 'val_loss' if val_data is not None else 'loss'
+    history = model.fit(
+        train_data,
+        validation_data=val_data,
+        epochs=epochs,
+        callbacks=[keras.callbacks.EarlyStopping(monitor=monitor, patience=3, restore_best_weights=True)],
+        verbose=2
+    )
+
+    fold_scaling(model, feature_mean, feature_std, target_mean, target_std)
+    model.save(output_path)
+
+    summary = {
+        "data": os.path.abspath(data_path),
+        "output": os.path.abspath(output_path),
+        "facilities": int(rows['FACILITY_NAME'].nunique()),
+        "rows": len(rows),
+        "horizon": horizon,
+        "train_windows": len(train_starts),
+        "val_windows": len(val_starts),
+        "validation_from": str(cutoff.astype('datetime64[D]')),
+        "epochs_run": len(history.history['loss']),
+        "train_seconds": round(time.perf_counter() - started, 1)
+    }
+    if val_data is not None:
+        best = int(np.argmin(history.history['val_loss']))
+        summary["val_mae"] = round(float(history.history['val_mae'][best]) * target_std, 3)
+    return summary
+
+def main():
+    _, options = parse_options(sys.argv[1:])
+    data_path = options.get("data")
+    if data_path is None:
+        # Prefer the file the forecast commands read, so training and serving windows match
+        data_path = DATA_PATH if os.path.exists(DATA_PATH) else PREPROCESSED_PATH
+
+    summary = train(
+        data_path,
+        options.get("output", MODEL_PATH),
+        epochs=int(options.get("epochs", 10)),
+        batch_size=int(options.get("batch-size", 256)),
+        horizon=int(options.get("horizon", 1)),
+        val_fraction=float(options.get("val-fraction", 0.1)),
+        mixed_precision=bool(options.get("mixed-precision")),
+        seed=int(options.get("seed", 0))
+    )
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
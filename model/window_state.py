@@ -0,0 +1,183 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from occupancy_store import OccupancyStore, order_by_facility, source_fingerprint
+
+WINDOW_STATE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'window_state.npz')
+
+# Number of time steps the model reads per forecast
+WINDOW = 30
+
+def _source_version(csv_path):
+    return source_fingerprint(csv_path) if os.path.exists(csv_path) else None
+
+def build_window_state(source, csv_path):
+    """Build the rolling window state from a DataFrame or a compiled occupancy store"""
+    if isinstance(source, OccupancyStore):
+        names = source.facilities()
+        counts = [source.row_count(name) for name in names]
+        recent = pd.concat([source.recent_rows(name, WINDOW) for name in names]) if names else None
+    else:
+        ordered = order_by_facility(source)
+        sizes = ordered.groupby('FACILITY_NAME', sort=True).size()
+        names, counts = list(sizes.index), sizes.tolist()
+        recent = ordered.groupby('FACILITY_NAME', sort=True).tail(WINDOW)
+
+    state = WindowState(source=_source_version(csv_path))
+    if names:
+        # Each facility's tail fills slots 0..k-1 of its ring; head points after the last row
+        filled = np.minimum(counts, WINDOW)
+        rows = np.repeat(np.arange(len(names)), filled)
+        slots = np.arange(len(rows)) - np.repeat(np.cumsum(filled) - filled, filled)
+        state._grow(len(names))
+        state.names = [str(name) for name in names]
+        state.rows = {name: i for i, name in enumerate(state.names)}
+        state.dates[rows, slots] = recent['OCCUPANCY_DATE'].to_numpy(dtype='datetime64[ns]')
+        state.occupancy[rows, slots] = recent['OCCUPANCY'].to_numpy(dtype=np.float64)
+        state.head[:len(names)] = filled % WINDOW
+        state.count[:len(names)] = counts
+    return state
+
+def read_occupancy_updates(path):
+    """Read new occupancy rows from a CSV with the history columns or a recorded-data JSON export"""
+    if path.endswith('.json'):
+        with open(path) as f:
+            records = json.load(f)
+        if isinstance(records, dict):
+            records = records.get("data", [])
+        # /api/recorded-data returns shelterName, currentOccupancy and an ISO timestamp
+        df = pd.DataFrame({
+            'OCCUPANCY_DATE': [record.get("timestamp") for record in records],
+            'FACILITY_NAME': [record.get("shelterName") for record in records],
+            'OCCUPANCY': [record.get("currentOccupancy") for record in records]
+        })
+        dates = pd.to_datetime(df['OCCUPANCY_DATE'], utc=True, format='ISO8601').dt.tz_localize(None)
+        df['OCCUPANCY_DATE'] = dates.dt.normalize()
+    else:
+        df = pd.read_csv(path, usecols=['OCCUPANCY_DATE', 'FACILITY_NAME', 'OCCUPANCY'],
+                         parse_dates=['OCCUPANCY_DATE'])
+    df = df.dropna(subset=['OCCUPANCY_DATE', 'FACILITY_NAME', 'OCCUPANCY'])
+    # Rows are applied oldest first, same-day rows in file order like the history
+    return df.sort_values('OCCUPANCY_DATE', kind='stable')
+
+def is_window_state_current(csv_path, path=WINDOW_STATE_PATH):
+    """Check that a window state exists and was built from the current CSV"""
+    if not os.path.exists(path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    with np.load(path) as data:
+        source = json.loads(str(data["source"]))
+    return source == source_fingerprint(csv_path)
+
+class WindowState:
+    """Per-shelter ring buffers holding the latest WINDOW occupancy rows.
+
+    Appending a day overwrites one slot of the shelter's ring, so keeping the
+    state up to date costs O(1) per new row regardless of how much history the
+    shelter has. It offers the same read methods as OccupancyStore, limited to
+    the latest WINDOW rows.
+    """
+
+    def __init__(self, source=None):
+        self.source = source
+        self.names = []
+        self.rows = {}
+        self.dates = np.zeros((0, WINDOW), dtype='datetime64[ns]')
+        self.occupancy = np.zeros((0, WINDOW), dtype=np.float64)
+        self.head = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def load(cls, path=WINDOW_STATE_PATH):
+        with np.load(path) as data:
+            state = cls(json.loads(str(data["source"])))
+            state.names = [str(name) for name in data["names"]]
+            state.rows = {name: i for i, name in enumerate(state.names)}
+            state.dates = data["dates"]
+            state.occupancy = data["occupancy"]
+            state.head = data["head"]
+            state.count = data["count"]
+        return state
+
+    def save(self, path=WINDOW_STATE_PATH):
+        """Write the state atomically so readers never see a partial file"""
+        n = len(self.names)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, source=json.dumps(self.source), names=np.array(self.names, dtype=str),
+                     dates=self.dates[:n], occupancy=self.occupancy[:n],
+                     head=self.head[:n], count=self.count[:n])
+        os.replace(tmp_path, path)
+
+    def _grow(self, size):
+        # Capacity doubles so adding shelters stays amortized O(1)
+        capacity = len(self.head)
+        if size <= capacity:
+            return
+        extra = max(size, capacity * 2) - capacity
+        self.dates = np.concatenate([self.dates, np.zeros((extra, WINDOW), dtype=self.dates.dtype)])
+        self.occupancy = np.concatenate([self.occupancy, np.zeros((extra, WINDOW), dtype=self.occupancy.dtype)])
+        self.head = np.concatenate([self.head, np.zeros(extra, dtype=self.head.dtype)])
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=self.count.dtype)])
+
+    def append(self, facility_name, date, occupancy):
+        """Add one row; returns False when it is older than the facility's latest row"""
+        row = self.rows.get(facility_name)
+        if row is None:
+            row = len(self.names)
+            self._grow(row + 1)
+            self.names.append(facility_name)
+            self.rows[facility_name] = row
+        date = np.datetime64(date, 'ns')
+        if self.count[row] and date < self.dates[row, (self.head[row] - 1) % WINDOW]:
+            return False
+        slot = self.head[row]
+        self.dates[row, slot] = date
+        self.occupancy[row, slot] = occupancy
+        self.head[row] = (slot + 1) % WINDOW
+        self.count[row] += 1
+        return True
+
+    def append_rows(self, df):
+        """Append a DataFrame of new rows and return how many were applied or rejected"""
+        applied = 0
+        rejected = 0
+        for name, date, occupancy in zip(df['FACILITY_NAME'], df['OCCUPANCY_DATE'], df['OCCUPANCY']):
+            if self.append(str(name), date, float(occupancy)):
+                applied += 1
+            else:
+                rejected += 1
+        return {"applied": applied, "out_of_order": rejected, "facilities": len(self.names)}
+
+    def facilities(self):
+        """Return all facility names in sorted order"""
+        return sorted(self.names)
+
+    def row_count(self, facility_name):
+        """Return the number of history rows seen for a facility (0 if unknown)"""
+        row = self.rows.get(facility_name)
+        return int(self.count[row]) if row is not None else 0
+
+    def _ordered_slots(self, row, n):
+        filled = min(int(self.count[row]), WINDOW, n)
+        return (self.head[row] - filled + np.arange(filled)) % WINDOW
+
+    def recent_rows(self, facility_name, n):
+        """Return the latest n (at most WINDOW) rows for a facility as a small DataFrame"""
+        row = self.rows.get(facility_name)
+        if row is None:
+            return None
+        slots = self._ordered_slots(row, n)
+        return pd.DataFrame({
+            'OCCUPANCY_DATE': pd.to_datetime(self.dates[row, slots]),
+            'FACILITY_NAME': facility_name,
+            'OCCUPANCY': self.occupancy[row, slots]
+        })
+
+    def windows(self, facility_names):
+        """Return (n, WINDOW) date and occupancy arrays for facilities with full windows"""
+        rows = np.array([self.rows[name] for name in facility_names], dtype=np.int64)
+        slots = (self.head[rows, np.newaxis] + np.arange(WINDOW)) % WINDOW
+        return self.dates[rows[:, np.newaxis], slots], self.occupancy[rows[:, np.newaxis], slots]